@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import parallelSolver
+from centralityAlgorithms import ALGORITHMS
+from graphModel import GraphModel
+
+
+def load_model(path):
+    '''
+    Loads a graph saved by fileIO.save_graph without the GUI. Nodes are numbered by their position in the file, the
+    same way load_graph numbers them
+
+    Parameters:
+        - path (str): The path of the json file
+
+    Returns:
+        - GraphModel: The model of the graph
+    '''
+    with open(path, 'r') as json_file:
+        return GraphModel.from_graph_data(json.load(json_file))
+
+
+def write_result(model, centralities, path, output_format):
+    '''
+    Writes the centrality of every edge
+
+    Parameters:
+        - model (GraphModel): The graph
+        - centralities (numpy.ndarray): The centrality of every edge, in the edge order of the file
+        - path (str): The output path
+        - output_format (str): 'csv' for node1,node2,centrality rows, 'npy' for the centralities array only
+    '''
+    if output_format == 'npy':
+        np.save(path, centralities)
+        return
+
+    edges = model.edge_keys()
+    with open(path, 'w') as csv_file:
+        csv_file.write('node1,node2,centrality\n')
+        np.savetxt(csv_file, np.column_stack((edges, centralities)), fmt=['%d', '%d', '%.10g'], delimiter=',')
+
+
+def output_path(path, algorithm, output_dir, output_format):
+    '''
+    Returns:
+        - str: The path of the result of one input file, next to it or in output_dir
+    '''
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(output_dir or os.path.dirname(path), f'{name}.{algorithm}.{output_format}')
+
+
+def process_file(path, algorithm, options, output_dir, output_format):
+    '''
+    Computes the centralities of one saved graph and writes them next to it, or into output_dir
+
+    Parameters:
+        - path (str): The path of the json file
+        - algorithm (str): Key of the algorithm in ALGORITHMS
+        - options (dictionary): Keyword arguments of the algorithm
+        - output_dir (str): Directory of the results, None for the directory of the input
+        - output_format (str): 'csv' or 'npy'
+
+    Returns:
+        - dictionary: Timing summary of the file
+    '''
+    start = time.perf_counter()
+    model = load_model(path)
+    loaded = time.perf_counter()
+
+    _, compute = ALGORITHMS[algorithm]
+    centralities = compute(model, **options)
+    computed = time.perf_counter()
+
+    result_path = output_path(path, algorithm, output_dir, output_format)
+    write_result(model, centralities, result_path, output_format)
+
+    return {'file': path, 'nodes': model.n, 'edges': model.m, 'load': loaded - start, 'compute': computed - loaded,
+            'write': time.perf_counter() - computed, 'output': result_path}
+
+
+def parse_arguments(argv=None):
+    '''
+    Returns:
+        - argparse.Namespace: The command line arguments
+    '''
+    parser = argparse.ArgumentParser(description='Computes edge centralities of graphs saved by NetCraft, without the GUI')
+
+    parser.add_argument('algorithm', choices=list(ALGORITHMS), help='Centrality algorithm')
+    parser.add_argument('files', nargs='+', help='json files written by File > Save')
+    parser.add_argument('-o', '--output-dir', help='Directory of the results, default: next to every input file')
+    parser.add_argument('-f', '--format', choices=('csv', 'npy'), default='csv', help='Output format')
+    parser.add_argument('-w', '--workers', type=int, default=os.cpu_count(),
+                        help='Worker processes, files are shared out to them when there are several')
+    parser.add_argument('--seed', type=int, help='Seed of the random projections of TreeC and Fast-TreeC')
+    parser.add_argument('--epsilon', type=float, help='Relative error of TreeC and Fast-TreeC, picks the projections')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    '''
+    Runs the batch and prints a timing summary per file
+
+    Returns:
+        - int: Exit status, 1 if any file failed
+    '''
+    args = parse_arguments(argv)
+
+    options = {}
+    if args.algorithm != 'spanning_edge_betweenness':
+        options = {'seed': args.seed, 'epsilon': args.epsilon}
+
+    # Inputs with the same name in different directories would overwrite each other's result in output_dir
+    outputs = {}
+    for path in args.files:
+        result_path = os.path.normcase(os.path.abspath(output_path(path, args.algorithm, args.output_dir, args.format)))
+        outputs.setdefault(result_path, []).append(path)
+
+    collisions = [paths for paths in outputs.values() if len(paths) > 1]
+    for paths in collisions:
+        print(f'{", ".join(paths)}: would write the same result file, rename them or drop -o', file=sys.stderr)
+    if collisions:
+        return 1
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    workers = max(args.workers or 1, 1)
+    tasks = [(path, args.algorithm, options, args.output_dir, args.format) for path in args.files]
+    summaries, failures = [], []
+    start = time.perf_counter()
+
+    if workers > 1 and len(tasks) > 1:
+        # One file per worker process, the solves inside a file then stay serial
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            futures = {pool.submit(process_file, *task): task[0] for task in tasks}
+            for future in as_completed(futures):
+                try:
+                    summaries.append(future.result())
+                except Exception as e:
+                    failures.append((futures[future], e))
+    else:
+        # A single file gets the workers for its own parallel solves
+        parallelSolver.set_worker_count(workers)
+        for task in tasks:
+            try:
+                summaries.append(process_file(*task))
+            except Exception as e:
+                failures.append((task[0], e))
+        parallelSolver.shutdown_pool()
+
+    print(f'{"file":<40} {"nodes":>9} {"edges":>10} {"load s":>8} {"compute s":>10} {"write s":>8}')
+    for summary in sorted(summaries, key=lambda summary: summary['file']):
+        print(f'{summary["file"]:<40} {summary["nodes"]:>9} {summary["edges"]:>10} {summary["load"]:>8.3f} '
+              f'{summary["compute"]:>10.3f} {summary["write"]:>8.3f}')
+
+    for path, error in failures:
+        print(f'{path}: failed: {error}', file=sys.stderr)
+
+    print(f'{len(summaries)} of {len(tasks)} files in {time.perf_counter() - start:.3f} s')
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import argparse
+import csv
+import json
+import sys
+
+import networkx as nx
+import numpy as np
+
+import parallelSolver
+from centralityAlgorithms import ALGORITHMS
+from factorizationCache import factorization_cache
+from graphModel import GraphModel
+from profiling import PhaseProfiler
+
+# Graph generators of the grid. density is the edge probability of the Erdos-Renyi graph, the other generators are
+# parametrised to the same expected number of edges
+GENERATORS = {
+    'erdos_renyi': lambda n, density, seed: nx.fast_gnp_random_graph(n, density, seed=seed),
+    'barabasi_albert': lambda n, density, seed: nx.barabasi_albert_graph(
+        n, min(max(int(round(density * (n - 1) / 2)), 1), n - 1), seed=seed),
+    'watts_strogatz': lambda n, density, seed: nx.connected_watts_strogatz_graph(
+        n, min(max(int(round(density * (n - 1))), 2), n - 1), 0.1, seed=seed),
+}
+
+# Phases reported by the algorithms, the columns of the csv output
+PHASES = ('decomposition', 'laplacian', 'factorisation', 'resistances', 'projection', 'solve', 'accumulation', 'blocks')
+
+# Fields of every record besides the phases
+FIELDS = ('generator', 'nodes', 'edges', 'density', 'algorithm', 'seed', 'epsilon', 'workers', 'seconds', 'cpu_seconds',
+          'peak_bytes', 'max_relative_error', 'mean_relative_error')
+
+
+def make_model(generator, n, density, seed):
+    '''
+    Generates a graph of the grid
+
+    Parameters:
+        - generator (str): Key of the generator in GENERATORS
+        - n (int): Number of nodes
+        - density (float): Edge probability, or the equivalent expected number of edges
+        - seed (int): Seed of the generator
+
+    Returns:
+        - GraphModel: The model of the graph
+    '''
+    graph = GENERATORS[generator](n, density, seed)
+    edges = np.array(graph.edges(), dtype=np.int64).reshape(-1, 2)
+
+    return GraphModel(np.arange(n), edges[:, 0], edges[:, 1])
+
+
+def run_algorithm(model, algorithm, options, trace_memory):
+    '''
+    Runs one algorithm on a cold factorization_cache
+
+    Parameters:
+        - model (GraphModel): The graph
+        - algorithm (str): Key of the algorithm in ALGORITHMS
+        - options (dictionary): Keyword arguments of the algorithm
+        - trace_memory (bool): Also measure the peak of traced allocations, which slows the run down
+
+    Returns:
+        - centralities (numpy.ndarray): The centrality of every edge
+        - profile (dictionary): Wall and CPU time of the run and its phases, see profiling.PhaseProfiler.finish
+    '''
+    _, compute = ALGORITHMS[algorithm]
+    factorization_cache.clear()
+
+    profiler = PhaseProfiler(algorithm, trace_memory=trace_memory, nodes=model.n, edges=model.m)
+    try:
+        centralities = compute(model, progress=profiler, **options)
+        return centralities, profiler.finish()
+    finally:
+        profiler.close()
+
+
+def relative_errors(approximate, exact):
+    '''
+    Returns:
+        - max_error, mean_error (float): Relative errors over the edges with a positive exact value
+    '''
+    positive = exact > 0
+    if not positive.any():
+        return 0.0, 0.0
+
+    errors = np.abs(approximate[positive] - exact[positive]) / exact[positive]
+    return float(errors.max()), float(errors.mean())
+
+
+def benchmark(args):
+    '''
+    Runs the whole grid
+
+    Parameters:
+        - args (argparse.Namespace): The command line arguments
+
+    Yields:
+        - dictionary: One record per graph and algorithm
+    '''
+    for generator in args.generators:
+        for n in args.sizes:
+            for density in args.densities:
+                model = make_model(generator, n, density, args.seed)
+
+                exact = None
+                if n <= args.exact_limit:
+                    exact, *_ = run_algorithm(model, 'spanning_edge_betweenness', {}, False)
+
+                for algorithm in args.algorithms:
+                    options = {} if algorithm == 'spanning_edge_betweenness' else \
+                        {'seed': args.seed, 'epsilon': args.epsilon}
+
+                    # Best of the timed repeats, memory is traced in a separate run since tracing slows it down
+                    runs = [run_algorithm(model, algorithm, options, False) for _ in range(args.repeat)]
+                    centralities, profile = min(runs, key=lambda run: run[1]['seconds'])
+                    peak = run_algorithm(model, algorithm, options, True)[1]['peak_bytes'] if args.memory else None
+
+                    max_error, mean_error = relative_errors(centralities, exact) if exact is not None else (None, None)
+
+                    yield {'generator': generator, 'nodes': model.n, 'edges': model.m, 'density': density,
+                           'algorithm': algorithm, 'seed': args.seed, 'epsilon': args.epsilon,
+                           'workers': parallelSolver.worker_count, 'seconds': profile['seconds'],
+                           'cpu_seconds': profile['cpu_seconds'], 'phases': profile['phases'],
+                           'peak_bytes': peak, 'max_relative_error': max_error, 'mean_relative_error': mean_error}
+
+
+def parse_arguments(argv=None):
+    '''
+    Returns:
+        - argparse.Namespace: The command line arguments
+    '''
+    parser = argparse.ArgumentParser(description='Scaling and accuracy benchmark of the centrality algorithms')
+
+    parser.add_argument('--sizes', type=int, nargs='+', default=[500, 1000, 2000], help='Numbers of nodes')
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.005, 0.01], help='Edge probabilities')
+    parser.add_argument('--generators', nargs='+', choices=list(GENERATORS), default=list(GENERATORS))
+    parser.add_argument('--algorithms', nargs='+', choices=list(ALGORITHMS), default=list(ALGORITHMS))
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the generators and the random projections')
+    parser.add_argument('--epsilon', type=float, help='Relative error of TreeC and Fast-TreeC, picks the projections')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per algorithm, the fastest is reported')
+    parser.add_argument('--exact-limit', type=int, default=5000,
+                        help='Largest graph compared against the exact values, the exact method is dense')
+    parser.add_argument('--no-memory', dest='memory', action='store_false', help="Don't trace the peak memory")
+    parser.add_argument('-w', '--workers', type=int, default=1, help='Worker processes of the parallel solves')
+    parser.add_argument('-f', '--format', choices=('jsonl', 'csv'), default='jsonl', help='Output format')
+    parser.add_argument('-o', '--output', help='Output file, default: standard output')
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    '''
+    Runs the benchmark and writes one record per graph and algorithm as it completes
+    '''
+    args = parse_arguments(argv)
+    parallelSolver.set_worker_count(args.workers)
+
+    output = open(args.output, 'w', newline='') if args.output else sys.stdout
+
+    # The wall time of every phase becomes a column of its own in the csv output
+    writer = csv.DictWriter(output, fieldnames=list(FIELDS) + [f'phase_{phase}' for phase in PHASES], restval='',
+                            extrasaction='ignore')
+    if args.format == 'csv':
+        writer.writeheader()
+
+    try:
+        for record in benchmark(args):
+            if args.format == 'jsonl':
+                output.write(json.dumps(record) + '\n')
+            else:
+                row = {key: value for key, value in record.items() if key != 'phases'}
+                row.update({f'phase_{phase}': times['wall'] for phase, times in record['phases'].items()})
+                writer.writerow(row)
+            output.flush()
+    finally:
+        parallelSolver.shutdown_pool()
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == '__main__':
+    main()
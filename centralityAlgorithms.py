@@ -0,0 +1,11 @@
+from fastTreeC import fast_treec_centrality
+from spanningEdgeBetweenness import spanning_edge_betweenness
+from treeC import treec_centrality
+
+# Centrality algorithms of the app and of batchCentrality: name -> (label, function computing the centralities).
+# Every function is called as function(model, progress=..., **options) and returns the centrality of every edge
+ALGORITHMS = {
+    'spanning_edge_betweenness': ('Spanning Edge Betweenness', spanning_edge_betweenness),
+    'treec': ('TreeC', treec_centrality),
+    'fast_treec': ('Fast-TreeC', fast_treec_centrality),
+}
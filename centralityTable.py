@@ -1,67 +1,176 @@
-from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import QTableWidget, QHeaderView, QTableWidgetItem
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtWidgets import QHeaderView, QTableView
 
 
-class CentralityTable(QTableWidget):
+class CentralityModel(QAbstractTableModel):
     '''
-    Custom QTableWidget class to display the centrality for each edge.
+    Custom QAbstractTableModel class backed directly by the result arrays of a centrality computation. Cells are
+    formatted only when the view asks for them and sorting permutes rows through an argsort, so the cost of showing a
+    result doesn't grow with the number of cells
+
+    Attributes:
+        - edges (numpy.ndarray): Array of shape (m, 2) with the keys of the endpoints of every edge, None while empty
+        - values (numpy.ndarray): The centrality of every edge, None while empty
+        - order (numpy.ndarray): Edge displayed in every row, None for the edge order of the result
+        - sort_column (int): Column the rows are sorted by, -1 when unsorted
+        - sort_order (Qt.SortOrder): Direction of the sort
     '''
 
-    def __init__(self, data_dict, parent=None):
+    HEADERS = ('Edge', 'Centrality')
+
+    def __init__(self, parent=None):
+        '''
+        Initialize a new instance of CentralityModel with no rows
+        '''
+        super().__init__(parent)
+
+        # numpy is imported with the first result, not at startup
+        self.edges = None
+        self.values = None
+        self.order = None
+
+        self.sort_column = -1
+        self.sort_order = Qt.SortOrder.AscendingOrder
+
+        # Ascending argsort of every column, computed on first use
+        self._sorted = {}
+
+    def set_data(self, edges, values):
         '''
-        Initialize a new instance of CentralityTable
+        Replaces the displayed result, keeping the current sort
 
         Parameters:
-            - data_dict (dictionary): Keys of the dictionary are the edges in the form (u, v) and values are the centralities
+            - edges (numpy.ndarray): Array of shape (m, 2) with the keys of the endpoints of every edge
+            - values (numpy.ndarray): The centrality of every edge
         '''
-        super().__init__(parent)
-        self.setup_table(data_dict)
+        import numpy as np
+
+        self.beginResetModel()
+
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self.values = np.asarray(values, dtype=np.float64)
+        self._sorted = {}
+        self.order = self._row_order(self.sort_column, self.sort_order)
+
+        self.endResetModel()
 
-    def setup_table(self, data_dict):
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() or self.values is None else len(self.values)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         '''
-        Set the properties of the table and calls another function to populate the table
+        Formats a cell when the view displays it
 
         Parameters:
-            - data_dict (dictionary): Keys of the dictionary are the edges in the form (u, v) and values are the centralities
+            - index (QModelIndex): The cell
+            - role (Qt.ItemDataRole): The requested role
+
+        Returns:
+            - str or Qt.AlignmentFlag: The text or the alignment of the cell, None for other roles
         '''
+        if not index.isValid():
+            return None
 
-        self.setColumnCount(2)
-        self.setHorizontalHeaderLabels(['Edge', 'Centrality'])
-        self.setRowCount(len(data_dict))
-        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignCenter
 
-        self.setSortingEnabled(True)
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
 
-        self.setAlternatingRowColors(True)
+        row = index.row() if self.order is None else int(self.order[index.row()])
 
-        self.populate_table(data_dict)
+        if index.column() == 0:
+            u, v = self.edges[row]
+            return f'({u},{v})'
 
-    def populate_table(self, data_dict):
+        return str(round(float(self.values[row]), 4))
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+
+        if orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+
+        return str(section + 1)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
         '''
-        Populates the table with the keys of the dictionary and their corresponding values
+        Sorts the rows by a column, called by the view when a header is clicked
 
         Parameters:
-            - data_dict (dictionary): Keys of the dictionary are the edges in the form (u, v) and values are the centralities
+            - column (int): The column, edges are ordered by their endpoint keys
+            - order (Qt.SortOrder): Direction of the sort
+        '''
+        self.layoutAboutToBeChanged.emit()
+
+        self.sort_column = column
+        self.sort_order = order
+        self.order = self._row_order(column, order)
+
+        self.layoutChanged.emit()
+
+    def _row_order(self, column, order):
         '''
+        Returns:
+            - numpy.ndarray: The edge displayed in every row when sorted by column, None when unsorted
+        '''
+        if column < 0 or self.values is None:
+            return None
+
+        import numpy as np
+
+        if column not in self._sorted:
+            if column == 0:
+                self._sorted[column] = np.lexsort((self.edges[:, 1], self.edges[:, 0]))
+            else:
+                self._sorted[column] = np.argsort(self.values, kind='stable')
 
-        for row, (edge, centrality) in enumerate(data_dict.items()):
-            edge_item = QTableWidgetItem(str(edge))
-            centrality_item = QTableWidgetItem(str(centrality))
+        if order == Qt.SortOrder.DescendingOrder:
+            return self._sorted[column][::-1]
 
-            edge_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            centrality_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
+        return self._sorted[column]
 
-            self.setItem(row, 0, edge_item)
-            self.setItem(row, 1, centrality_item)
 
-    def update_table(self, new_data_dict):
+class CentralityTable(QTableView):
+    '''
+    Custom QTableView class to display the centrality for each edge.
+    '''
+
+    def __init__(self, parent=None):
+        '''
+        Initialize a new instance of CentralityTable with an empty CentralityModel
+        '''
+        super().__init__(parent)
+        self.setup_table()
+
+    def setup_table(self):
+        '''
+        Set the properties of the table and its model
+        '''
+
+        self.setModel(CentralityModel(self))
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+
+        # Fixed row heights, so the view never measures the rows of a large result
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+
+        # Rows start in the edge order of the result until a header is clicked
+        self.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.setSortingEnabled(True)
+
+        self.setAlternatingRowColors(True)
+
+    def update_table(self, edges, values):
         '''
         Updates the table to display the new edges and their centralities
 
         Parameters:
-            - new_data_dict (dictionary): A new dictionary containing edges and their centralities to display on the table
+            - edges (numpy.ndarray): Array of shape (m, 2) with the keys of the endpoints of every edge
+            - values (numpy.ndarray): The centrality of every edge
         '''
 
-        self.clearContents()
-        self.setRowCount(len(new_data_dict))
-        self.populate_table(new_data_dict)
+        self.model().set_data(edges, values)
@@ -0,0 +1,261 @@
+from concurrent.futures import CancelledError
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from centralityAlgorithms import ALGORITHMS
+from incrementalCentrality import INCREMENTAL_MAX_NODES, IncrementalSpanningBetweenness
+from nodeObject import node_list
+from profiling import PhaseProfiler, format_profile
+from resultCache import result_cache
+
+
+class CentralitySignals(QObject):
+    '''
+    Signals of CentralityWorker, emitted from the worker thread and delivered in the GUI thread
+
+    Attributes:
+        - progress (pyqtSignal): Name of the current phase and completed fraction of the run
+        - finished (pyqtSignal): The centrality of every edge of the snapshot
+        - failed (pyqtSignal): Error message of a failed run
+        - cancelled (pyqtSignal): Emitted when the run stopped after a cancel request
+    '''
+    progress = pyqtSignal(str, float)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    cancelled = pyqtSignal()
+
+
+class CentralityWorker(QRunnable):
+    '''
+    Custom QRunnable class which computes the centralities of a graph snapshot in a thread of the pool
+
+    Attributes:
+        - algorithm (str): Key of the algorithm in ALGORITHMS
+        - model (GraphModel): Snapshot of the graph, it is never modified while the worker runs
+        - options (dictionary): Keyword arguments of the algorithm
+        - signals (CentralitySignals): Signals reporting progress and result
+        - cancel_requested (bool): Set by cancel, checked on every progress report
+        - profile (dictionary): Phase breakdown of the finished run, see profiling.PhaseProfiler.finish
+    '''
+
+    def __init__(self, algorithm, model, options=None):
+        '''
+        Initialize a new instance of CentralityWorker
+
+        Parameters:
+            - algorithm (str): Key of the algorithm in ALGORITHMS
+            - model (GraphModel): Snapshot of the graph
+            - options (dictionary): Keyword arguments of the algorithm, e.g. seed or epsilon
+        '''
+        super().__init__()
+
+        self.algorithm = algorithm
+        self.model = model
+        self.options = options or {}
+        self.signals = CentralitySignals()
+        self.cancel_requested = False
+        self.profile = None
+
+    def run(self):
+        '''Runs the algorithm and emits its result'''
+        _, compute = ALGORITHMS[self.algorithm]
+
+        # Every progress report goes through the profiler first
+        profiler = PhaseProfiler(self.algorithm, self.report, nodes=self.model.n, edges=self.model.m, **self.options)
+
+        try:
+            centralities = compute(self.model, progress=profiler, **self.options)
+        except CancelledError:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.profile = profiler.finish()
+            self.signals.finished.emit(centralities)
+        finally:
+            profiler.close()
+
+    def report(self, phase, fraction):
+        '''
+        Progress callback of the algorithm. Stops the computation if cancel has been requested
+
+        Parameters:
+            - phase (str): Name of the current phase
+            - fraction (float): Completed fraction of the run
+        '''
+        if self.cancel_requested:
+            raise CancelledError()
+        self.signals.progress.emit(phase, fraction)
+
+    def cancel(self):
+        '''Requests the worker to stop at its next progress report'''
+        self.cancel_requested = True
+
+
+def run_centrality(window, algorithm, **options):
+    '''
+    Starts computing the centralities of the current graph in the background. A run that is still in progress is
+    cancelled first. Results already in result_cache are displayed right away
+
+    Parameters:
+        - window (QMainWindow): The main window of the app
+        - algorithm (str): Key of the algorithm in ALGORITHMS
+        - options: Keyword arguments of the algorithm, e.g. seed or epsilon
+    '''
+
+    if not node_list:
+        return
+
+    cancel_centrality(window)
+
+    label, _ = ALGORITHMS[algorithm]
+    model = window.graphic_view.graphModel()
+
+    centralities = result_cache.get(model, algorithm, options)
+    if centralities is not None:
+        display_centralities(window, label, model, centralities)
+        return
+
+    worker = CentralityWorker(algorithm, model, options)
+    worker.signals.progress.connect(lambda phase, fraction: show_progress(window, worker, label, phase, fraction))
+    worker.signals.finished.connect(lambda centralities: show_centralities(window, worker, label, model, centralities))
+    worker.signals.failed.connect(lambda message: finish_centrality(window, worker, f'{label} failed: {message}'))
+    worker.signals.cancelled.connect(lambda: finish_centrality(window, worker, f'{label} cancelled'))
+
+    window.centrality_worker = worker
+    window.cancel_centrality_action.setEnabled(True)
+
+    QThreadPool.globalInstance().start(worker)
+
+
+def cancel_centrality(window):
+    '''
+    Cancels the centrality computation in progress, if any
+
+    Parameters:
+        - window (QMainWindow): The main window of the app
+    '''
+
+    if window.centrality_worker is not None:
+        window.centrality_worker.cancel()
+
+
+def show_progress(window, worker, label, phase, fraction):
+    '''
+    Displays the progress of a worker in the status bar
+
+    Parameters:
+        - window (QMainWindow): The main window of the app
+        - worker (CentralityWorker): The worker reporting progress
+        - label (str): Name of the algorithm
+        - phase (str): Name of the current phase
+        - fraction (float): Completed fraction of the run
+    '''
+
+    if window.centrality_worker is worker:
+        window.statusBar().showMessage(f'{label}: {phase} {int(100 * fraction)}%')
+
+
+def finish_centrality(window, worker, message=None):
+    '''
+    Clears the state of a finished worker and restores the status bar
+
+    Parameters:
+        - window (QMainWindow): The main window of the app
+        - worker (CentralityWorker): The worker that finished
+        - message (str): Message to display instead of the node and edge count
+    '''
+
+    # A newer run replaced this worker, leave its state alone
+    if window.centrality_worker is not worker:
+        return
+
+    window.centrality_worker = None
+    window.cancel_centrality_action.setEnabled(False)
+
+    if message is None:
+        message = f'Nodes: {len(node_list)} | Edges: {len(window.graphic_view.edges)}'
+    window.statusBar().showMessage(message)
+
+
+def show_centralities(window, worker, label, model, centralities):
+    '''
+    Displays the result of a worker in the side dock
+
+    Parameters:
+        - window (QMainWindow): The main window of the app
+        - worker (CentralityWorker): The worker that computed the result
+        - label (str): Name of the algorithm
+        - model (GraphModel): The snapshot the centralities were computed on
+        - centralities (numpy.ndarray): The centrality of every edge of the snapshot
+    '''
+
+    # Cache even a result that a newer run replaced, it is still valid for its snapshot
+    result_cache.put(model, worker.algorithm, worker.options, centralities)
+
+    if window.centrality_worker is not worker:
+        return
+
+    finish_centrality(window, worker)
+    display_centralities(window, label, model, centralities, worker.profile)
+
+
+def display_centralities(window, label, model, centralities, profile=None):
+    '''
+    Fills the side dock with the centrality of every edge and the phase breakdown of the run
+
+    Parameters:
+        - window (QMainWindow): The main window of the app
+        - label (str): Name of the algorithm
+        - model (GraphModel): The graph the centralities belong to
+        - centralities (numpy.ndarray): The centrality of every edge of the model
+        - profile (dictionary): Phase breakdown of the run, None for results that weren't computed now
+    '''
+
+    window.side_table.update_table(model.edge_keys(), centralities)
+    window.side_label.setText(f'Algorithm: {label}')
+
+    window.profile_label.setText('' if profile is None else format_profile(profile))
+    window.profile_label.setHidden(profile is None)
+
+    window.dock_widget.setHidden(False)
+
+
+def toggle_live_centrality(window, enabled):
+    '''
+    Turns the live Spanning Edge Betweenness on or off. While it is on, every edit of the graph updates the
+    centralities incrementally instead of requiring a new run
+
+    Parameters:
+        - window (QMainWindow): The main window of the app
+        - enabled (bool): The new state of the live update action
+    '''
+    graphic_view = window.graphic_view
+
+    if not enabled:
+        graphic_view.live_centrality = None
+        return
+
+    if len(node_list) > INCREMENTAL_MAX_NODES:
+        window.live_centrality_action.setChecked(False)
+        window.statusBar().showMessage(f'Live update supports up to {INCREMENTAL_MAX_NODES} nodes')
+        return
+
+    cancel_centrality(window)
+
+    graphic_view.live_centrality = IncrementalSpanningBetweenness(graphic_view.graphModel())
+    show_live_centrality(window)
+
+
+def show_live_centrality(window):
+    '''
+    Displays the current live centralities in the side dock
+
+    Parameters:
+        - window (QMainWindow): The main window of the app
+    '''
+    model = window.graphic_view.graphModel()
+    centralities = window.graphic_view.live_centrality.centralities(model)
+
+    label, _ = ALGORITHMS['spanning_edge_betweenness']
+    display_centralities(window, f'{label} (live)', model, centralities)
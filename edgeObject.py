@@ -49,14 +49,17 @@ class EdgeObject(QGraphicsLineItem):
         Returns:
             - QPointF: The point of the node closest to the reference node
         '''
-        if node is not None and node.scene() is not None:
-            center_point = node.pos() + QPointF(node.pixmap().width() / 2, node.pixmap().height() / 2)
-        else:
+        # Nodes drawn by the GraphRenderer of a large graph are out of the scene, but keep their position and icon
+        if node is None:
             return reference_node.pos()
 
-        direction = reference_node.pos() - center_point
-        direction /= QLineF(center_point, reference_node.pos()).length()  # Normalize the direction vector
+        # The half extents of the icon are precomputed by pixmap_cache, the pixmap isn't queried
+        half_width, half_height = node.half_width, node.half_height
+        center_point = node.pos() + QPointF(half_width, half_height)
+        reference_point = reference_node.pos()
+
+        direction = reference_point - center_point
+        direction /= QLineF(center_point, reference_point).length()  # Normalize the direction vector
 
         # Multiply the direction components individually
-        return center_point + QPointF(direction.x() * (node.pixmap().width() / 2),
-                                      direction.y() * (node.pixmap().height() / 2))
+        return center_point + QPointF(direction.x() * half_width, direction.y() * half_height)
@@ -0,0 +1,106 @@
+import threading
+from collections import OrderedDict
+from hashlib import blake2b
+from multiprocessing import parent_process
+
+# Memory budget of factorization_cache, in bytes
+FACTORIZATION_CACHE_BYTES = 512 << 20
+
+
+def _nbytes(value):
+    '''
+    Estimates the memory held by a cached value from the numpy arrays it references. numpy isn't imported here, so that
+    GraphicView can clear the cache without loading it at startup
+
+    Parameters:
+        - value: numpy array, scipy sparse matrix, GraphModel or a tuple / list of them
+
+    Returns:
+        - int: Approximate size in bytes
+    '''
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(item) for item in value)
+    if hasattr(value, 'nbytes'):
+        return value.nbytes
+    if hasattr(value, '__dict__'):
+        return sum(item.nbytes for item in vars(value).values() if hasattr(item, 'nbytes'))
+    return 0
+
+
+class FactorizationCache:
+    '''
+    Thread-safe LRU cache of the expensive per-graph structures shared by the centrality algorithms: the Laplacian,
+    its grounding and factorisations, and the block decomposition. Entries are keyed by the fingerprint of the model
+    they were built for, so every algorithm running on the same graph (or on the same batch of blocks) reuses them.
+
+    The cache is bypassed in the worker processes of parallelSolver, which can't see clear calls of the app
+
+    Attributes:
+        - max_bytes (int): Memory budget, the least recently used entries are evicted beyond it
+        - nbytes (int): Memory held by the cached entries
+        - entries (OrderedDict): Maps (digest, kind) to (value, size)
+    '''
+
+    def __init__(self, max_bytes=FACTORIZATION_CACHE_BYTES):
+        '''
+        Initialize a new instance of FactorizationCache
+
+        Parameters:
+            - max_bytes (int): Memory budget in bytes
+        '''
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, model, kind, build, ordered=False):
+        '''
+        Returns the cached structure of a model, building and caching it when missing. Cached values are shared, callers
+        must not modify them
+
+        Parameters:
+            - model (GraphModel): The graph
+            - kind (hashable): Name of the structure and any option it depends on
+            - build (function): Called without arguments to build the structure
+            - ordered (bool): The structure depends on the edge order of the model, not only on its edge set
+
+        Returns:
+            - The cached or newly built structure
+        '''
+        if parent_process() is not None:
+            return build()
+
+        digest, _ = model.fingerprint()
+        if ordered:
+            digest += blake2b(model.src.tobytes() + model.dst.tobytes(), digest_size=16).hexdigest()
+        key = (digest, kind)
+
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key][0]
+
+        # Built outside the lock, two threads may build the same entry but never block each other
+        value = build()
+        size = _nbytes(value)
+
+        with self._lock:
+            if size <= self.max_bytes and key not in self.entries:
+                self.entries[key] = (value, size)
+                self.nbytes += size
+
+                while self.nbytes > self.max_bytes:
+                    _, (_, evicted) = self.entries.popitem(last=False)
+                    self.nbytes -= evicted
+
+        return value
+
+    def clear(self):
+        '''Drops every cached structure'''
+        with self._lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+
+# Structures shared by all the centrality algorithms, cleared by GraphicView on every edit
+factorization_cache = FactorizationCache()
@@ -1,76 +1,93 @@
 import numpy as np
 
-from spanningEdgeBetweenness import get_laplacian_matrix
-from treeC import edge_incidence_matrix
+from graphDecomposition import blockwise, report_nothing
+from laplacianSolver import LaplacianSolver
+from randomProjection import achlioptas_matrix, projection_dimension, projection_scale
+from treeC import incidence_project
 
 
-def fastTreeC(window, node_list):
+def fast_treec_resistances(model, epsilon=None, rng=None, solver_options=None, progress=report_nothing):
     '''
-    Calculates the Spanning Edge Betweenness centrality for every edge by using the Fast-TreeC algorithm
+    Approximates the effective resistance of every edge of the model by using the Fast-TreeC algorithm
 
     Parameters:
-        - window (QMainWindow): The main window of the app
-        - node_list (list of NodeObject): The nodes of the graph
+        - model (GraphModel): The graph
+        - epsilon (float): Johnson-Lindenstrauss relative error that picks k, None for k = ceil(log2 n)
+        - rng (numpy.random.Generator): Source of randomness of the projections
+        - solver_options (dictionary): Keyword arguments of LaplacianSolver, e.g. method, tol, maxiter, preconditioner
+        - progress (function): Progress callback, see graphDecomposition.report_nothing
+
+    Returns:
+        - numpy.ndarray: The centrality of every edge, in the edge order of the model
 
     Fast-TreeC Algorithm:
-        - Construct the Laplacian matrix of the graph
-        - Construct the Edge Incidence matrix B and compute the matrix Y = QB
-        - for i ... k do
-            Construct a random {0, +-1/sqrt(k)} projection vector q of size 1 x m
-            Compute y = qB
+        - Construct the Laplacian matrix of the graph, ground it per connected component and prepare its solver
+        - for i ... k do, in chunks of parallel solves when the process pool is used
+            Construct a sparse Achlioptas projection vector q of size 1 x m with entries sqrt(3/k) * {+1, 0, -1}
+            Compute y = qB by scatter-adds over the edge endpoints, B: Edge Incidence matrix
             Approximate z by solving Lz = y
-            Compute R(e) = R(e) + ||z(u) - z(v)||_2^2, R(e) is equivalent to the spanning betweenness centrality of the edge e
+            Compute R(e) = R(e) + (z(u) - z(v))^2 for all edges at once, R(e) is equivalent to the spanning
+            betweenness centrality of the edge e
     '''
 
-    if not node_list:
-        return
-
-    # Compute Laplacian matrix L
-    L = get_laplacian_matrix(window.graphic_view.edges, node_list)
+    if rng is None:
+        rng = np.random.default_rng()
 
-    # Construct the Edge Incidence matrix
-    B = edge_incidence_matrix(window.graphic_view.edges, node_list)
+    # Prepare the solver of the grounded Laplacian matrix
+    progress('laplacian', 0.0)
+    solver = LaplacianSolver(model, **(solver_options or {}))
 
     # Number of nodes and edges in the graph
-    n = len(node_list)
-    m = len(window.graphic_view.edges)
+    n = model.n
+    m = model.m
 
-    # Initialize resistance distances
-    R = {}
+    # Iterations solved together, more than one only when the solver shares them out to the process pool
+    chunk = solver.parallel_columns
+
+    # Initialize resistance distances and the buffer reused by every solve
+    R = np.zeros(m, dtype=np.float64)
+    z = np.empty((n, chunk))
 
     # Iterate over k dimensions
-    k = int(np.ceil(np.log2(n)))  # k = O(log n)
-    for i in range(k):
-        # Construct a random vector q
-        q = np.random.choice([-1/np.sqrt(k), 0, 1/np.sqrt(k)], size=(1, m))
+    k = projection_dimension(n, epsilon)
+    scale = projection_scale(k)
+    for i in range(0, k, chunk):
+        c = min(chunk, k - i)
+
+        # Construct c random vectors q, one at a time so the stream doesn't depend on the chunk size
+        progress('projection', 0.1 + 0.9 * i / k)
+        q = np.vstack([achlioptas_matrix(1, m, rng) for _ in range(c)])
 
-        # Compute y = qB
-        y = np.dot(q, B)
+        # Compute y = qB without building B
+        y = scale * incidence_project(q, model)
 
         # Approximate z by solving Lz = y
-        try:
-            z = np.linalg.solve(L, y.T)
-        except np.linalg.LinAlgError as e:
-            if 'Singular matrix' in str(e):
-                # If matrix is singular use a least squares solution
-                z = np.linalg.lstsq(L, y.T, rcond=None)[0]
-            else:
-                print('Error:', e)
-
-        # Update resistance distances for each edge
-        for edge in window.graphic_view.edges:
-            u, v = edge.node1.key, edge.node2.key
-
-            # If the edge is not in the dictionary add it
-            if f'({u},{v})' not in R:
-                R[f'({u},{v})'] = 0
-
-            # Update resistance for the edge
-            R[f'({u},{v})'] += np.linalg.norm(z[u] - z[v])**2
-
-    for edge in R:
-        R[edge] = round(R[edge], 4)
-
-    window.side_table.update_table(R)
-    window.side_label.setText('Algorithm: Fast-TreeC')
-    window.dock_widget.setHidden(False)
+        progress('solve', 0.1 + 0.9 * i / k)
+        solver.solve(y.T, out=z[:, :c],
+                     progress=lambda phase, fraction: progress(phase, 0.1 + 0.9 * (i + fraction * c) / k))
+
+        # Update resistance distances for all edges
+        progress('accumulation', 0.1 + 0.9 * (i + c) / k)
+        R += np.sum((z[model.src, :c] - z[model.dst, :c])**2, axis=1)
+
+    return R
+
+
+def fast_treec_centrality(model, epsilon=None, seed=None, solver_options=None, progress=report_nothing):
+    '''
+    Calculates the Spanning Edge Betweenness centrality for every edge of the model by using the Fast-TreeC algorithm.
+    Bridges get their exact value 1 and every batch of biconnected blocks is approximated independently
+
+    Parameters:
+        - model (GraphModel): The graph
+        - epsilon (float): Johnson-Lindenstrauss relative error that picks k, None for k = ceil(log2 n)
+        - seed (int): Seed of the random projections, None for a fresh one on every run
+        - solver_options (dictionary): Keyword arguments of LaplacianSolver, e.g. method, tol, maxiter, preconditioner
+        - progress (function): Progress callback, see graphDecomposition.report_nothing
+
+    Returns:
+        - numpy.ndarray: The centrality of every edge, in the edge order of the model
+    '''
+
+    return blockwise(model, fast_treec_resistances, progress, seeds=np.random.SeedSequence(seed), epsilon=epsilon,
+                     solver_options=solver_options)
@@ -1,4 +1,3 @@
-from PyQt6.QtCore import QPointF
 from PyQt6.QtWidgets import QMessageBox
 
 from nodeObject import node_list
@@ -18,7 +17,9 @@ def save_graph(window, save_path):
     '''
     nodes_data = [{'key': node.key, 'x': node.x(), 'y': node.y()} for node in node_list]
 
-    edges_data = [[node_list.index(edge.node1), node_list.index(edge.node2)] for edge in window.graphic_view.edges]
+    # The model stores edge endpoints as positions in node_list
+    model = window.graphic_view.graphModel()
+    edges_data = [[u, v] for u, v in zip(model.src.tolist(), model.dst.tolist())]
 
     graph_data = {'nodes': nodes_data, 'edges': edges_data}
 
@@ -39,7 +40,7 @@ def load_graph(window, open_path):
         - open_path (str): The path where the json file is stored
 
     Returns:
-        - node_list (list of NodeObject): The nodes of the graph
+        - node_list (NodeList): The nodes of the graph
     '''
 
     try:
@@ -49,16 +50,9 @@ def load_graph(window, open_path):
         nodes_data = graph_data.get('nodes', [])
         edges_data = graph_data.get('edges', [])
 
-        # Create nodes
-        for node in nodes_data:
-            window.graphic_view.addNode(QPointF(node['x'], node['y']))
-
-        # Create edges
-        for edge_data in edges_data:
-            if len(edge_data) == 2:
-                node1 = node_list[edge_data[0]]
-                node2 = node_list[edge_data[1]]
-                window.graphic_view.addLink(node1, node2)
+        # Create the nodes at their saved positions and the edges between them in one batch
+        window.graphic_view.addGraph([(node['x'], node['y']) for node in nodes_data],
+                                     [edge_data for edge_data in edges_data if len(edge_data) == 2])
 
         window.saved = True
 
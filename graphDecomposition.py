@@ -0,0 +1,235 @@
+import numpy as np
+
+from factorizationCache import factorization_cache
+from graphModel import GraphModel
+
+# Small blocks are packed together into one problem of up to this many nodes to avoid per-block overhead
+BLOCK_BATCH_NODES = 2000
+
+
+def report_nothing(phase, fraction):
+    '''
+    Default progress callback of the centrality algorithms. A callback receives the name of the current phase and the
+    completed fraction of the run, and may raise concurrent.futures.CancelledError to stop the computation
+
+    Parameters:
+        - phase (str): Name of the current phase
+        - fraction (float): Completed fraction of the run, between 0 and 1
+    '''
+
+
+def biconnected_blocks(model):
+    '''
+    Splits the edges of the graph into biconnected blocks with an iterative version of Tarjan's algorithm.
+    Works on the simple graph, so duplicate edges always share a block
+
+    Parameters:
+        - model (GraphModel): The graph
+
+    Returns:
+        - labels (numpy.ndarray): Block of every edge of the model, -1 for self-loops
+        - block_num (int): Number of blocks
+    '''
+
+    n = model.n
+    u, v, inverse = model.simple_edges(return_inverse=True)
+    simple_num = len(u)
+
+    # CSR adjacency of the simple graph that also stores the id of the edge behind every neighbor entry
+    rows = np.concatenate((u, v))
+    order = np.argsort(rows, kind='stable')
+    neighbors = np.concatenate((v, u))[order].tolist()
+    edge_ids = np.concatenate((np.arange(simple_num), np.arange(simple_num)))[order].tolist()
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+    indptr = indptr.tolist()
+
+    discovery = [-1] * n
+    low = [0] * n
+    simple_labels = [0] * simple_num
+    edge_stack = []
+    block_num = 0
+    time = 0
+
+    for root in range(n):
+        if discovery[root] != -1:
+            continue
+
+        discovery[root] = low[root] = time
+        time += 1
+
+        # Every frame holds the node, the edge it was reached through and the position of its next neighbor
+        stack = [[root, -1, indptr[root]]]
+        while stack:
+            frame = stack[-1]
+            node, parent_edge, i = frame
+
+            if i < indptr[node + 1]:
+                frame[2] += 1
+                neighbor, edge = neighbors[i], edge_ids[i]
+
+                if edge == parent_edge:
+                    continue
+
+                if discovery[neighbor] == -1:
+                    # Tree edge
+                    edge_stack.append(edge)
+                    discovery[neighbor] = low[neighbor] = time
+                    time += 1
+                    stack.append([neighbor, edge, indptr[neighbor]])
+                elif discovery[neighbor] < discovery[node]:
+                    # Back edge
+                    edge_stack.append(edge)
+                    low[node] = min(low[node], discovery[neighbor])
+                continue
+
+            stack.pop()
+            if not stack:
+                continue
+
+            parent = stack[-1][0]
+            low[parent] = min(low[parent], low[node])
+
+            # The parent separates the subtree of node, so the edges on top of the stack form a block
+            if low[node] >= discovery[parent]:
+                while True:
+                    edge = edge_stack.pop()
+                    simple_labels[edge] = block_num
+                    if edge == parent_edge:
+                        break
+                block_num += 1
+
+    labels = np.full(model.m, -1, dtype=np.int64)
+    labels[inverse >= 0] = np.asarray(simple_labels, dtype=np.int64)[inverse[inverse >= 0]]
+
+    return labels, block_num
+
+
+def decompose(model, batch_nodes=BLOCK_BATCH_NODES):
+    '''
+    Decomposes the graph into independent problems for the centrality computation. Every connected component splits
+    into its biconnected blocks, the effective resistance of an edge only depends on its own block. Bridges are blocks
+    with a single edge and are reported separately, every spanning tree contains them
+
+    Blocks are packed into batches of up to batch_nodes nodes. The blocks of a batch become separate components of the
+    batch's model, an articulation point gets one copy per block
+
+    Parameters:
+        - model (GraphModel): The graph
+        - batch_nodes (int): Node budget of a batch of small blocks
+
+    Returns:
+        - bridges (numpy.ndarray): Indices of the edges of the model that are bridges
+        - batches (list of tuples): (GraphModel, numpy.ndarray) pairs, the model of a batch and the indices of the
+          edges of the original model in its edge order
+    '''
+
+    labels, block_num = biconnected_blocks(model)
+
+    # A graph of self-loops only has no blocks, all its edges are 0.0
+    if block_num == 0:
+        return np.zeros(0, dtype=np.int64), []
+
+    # Number of distinct simple edges of every block, blocks with one edge are bridges
+    u, v, inverse = model.simple_edges(return_inverse=True)
+    simple_blocks = np.zeros(len(u), dtype=np.int64)
+    simple_blocks[inverse[inverse >= 0]] = labels[inverse >= 0]
+    block_edges = np.bincount(simple_blocks, minlength=block_num)
+
+    is_bridge = (labels >= 0) & (block_edges[np.maximum(labels, 0)] == 1)
+    bridges = np.flatnonzero(is_bridge)
+
+    # Edges solved by the batches, grouped by block
+    solved = np.flatnonzero((labels >= 0) & ~is_bridge)
+    solved = solved[np.argsort(labels[solved], kind='stable')]
+
+    if not len(solved):
+        return bridges, []
+
+    # One node per (block, endpoint) pair, articulation points get a copy in every block they belong to
+    block_of = labels[solved]
+    copies, local = np.unique(np.concatenate((block_of * model.n + model.src[solved],
+                                              block_of * model.n + model.dst[solved])), return_inverse=True)
+    local_src, local_dst = local[:len(solved)], local[len(solved):]
+
+    # Assign whole blocks to batches by the running node count
+    copy_blocks = copies // model.n
+    block_ids, block_nodes = np.unique(copy_blocks, return_counts=True)
+    block_batch = np.zeros(block_num, dtype=np.int64)
+    block_batch[block_ids] = (np.cumsum(block_nodes) - block_nodes) // max(batch_nodes, 1)
+
+    # Edges and copies are sorted by block, so every batch is a contiguous range of both
+    edge_batch = block_batch[block_of]
+    node_batch = block_batch[copy_blocks]
+    batch_ids = np.unique(edge_batch)
+
+    edge_bounds = np.searchsorted(edge_batch, batch_ids), np.searchsorted(edge_batch, batch_ids, side='right')
+    node_bounds = np.searchsorted(node_batch, batch_ids), np.searchsorted(node_batch, batch_ids, side='right')
+
+    batches = []
+    for edge_start, edge_end, node_start, node_end in zip(*edge_bounds, *node_bounds):
+        # Relabel the copies of the batch to 0 ... node_end - node_start - 1
+        batch_model = GraphModel(np.arange(node_end - node_start),
+                                 local_src[edge_start:edge_end] - node_start,
+                                 local_dst[edge_start:edge_end] - node_start)
+        batches.append((batch_model, solved[edge_start:edge_end]))
+
+    return bridges, batches
+
+
+def blockwise(model, compute, progress=report_nothing, seeds=None, workers=None, **options):
+    '''
+    Runs a centrality computation independently on every batch of biconnected blocks of the graph.
+    Bridges get the exact value 1.0 and self-loops 0.0. Large graphs with several batches are solved on the process
+    pool of parallelSolver
+
+    Parameters:
+        - model (GraphModel): The graph
+        - compute (function): Module-level function called as compute(batch_model, progress=..., **options), returns
+          the centrality of the edges of the batch
+        - progress (function): Progress callback, see report_nothing
+        - seeds (numpy.random.SeedSequence): If given, every batch gets its own generator as the rng keyword, spawned
+          in batch order so that the result doesn't depend on how the batches are scheduled
+        - workers (int): Worker processes, None for parallelSolver.worker_count
+        - options: Further keyword arguments of compute
+
+    Returns:
+        - numpy.ndarray: The centrality of every edge, in the edge order of the model
+    '''
+
+    from parallelSolver import map_batches, parallel_enabled
+
+    centralities = np.zeros(model.m)
+
+    # The decomposition is shared by all the algorithms run on the same graph, and so are the factorisations of the
+    # batches through their own fingerprints
+    progress('decomposition', 0.0)
+    bridges, batches = factorization_cache.get(model, 'decomposition', lambda: decompose(model), ordered=True)
+    centralities[bridges] = 1.0
+
+    batch_options = [dict(options) for _ in batches]
+    if seeds is not None:
+        for batch_option, child in zip(batch_options, seeds.spawn(len(batches))):
+            batch_option['rng'] = np.random.default_rng(child)
+
+    # Every batch advances the progress by its share of the solved edges
+    total = max(sum(len(edges) for _, edges in batches), 1)
+
+    if len(batches) > 1 and parallel_enabled(total, workers):
+        results = map_batches(compute, batches, batch_options, progress, workers)
+
+        for (_, edges), result in zip(batches, results):
+            centralities[edges] = result
+    else:
+        done = 0
+
+        for (batch_model, edges), batch_option in zip(batches, batch_options):
+            def report(phase, fraction):
+                progress(phase, (done + fraction * len(edges)) / total)
+
+            centralities[edges] = compute(batch_model, progress=report, **batch_option)
+            done += len(edges)
+
+    progress('done', 1.0)
+
+    return centralities
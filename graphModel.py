@@ -0,0 +1,189 @@
+from hashlib import blake2b
+
+import numpy as np
+
+
+class GraphModel:
+    '''
+    Qt-free, array-backed snapshot of a graph. The centrality algorithms only read from this class, so they never
+    touch NodeObject / EdgeObject items.
+
+    Attributes:
+        - keys (numpy.ndarray): int64 array with the key of every node, in node order
+        - key_index (dict): Maps a node key to its compact index in keys
+        - src, dst (numpy.ndarray): int32 arrays with the compact indices of the endpoints of every edge
+    '''
+
+    def __init__(self, keys, src, dst):
+        '''
+        Initialize a new instance of GraphModel
+
+        Parameters:
+            - keys (array-like of int): The key of every node, in node order
+            - src, dst (array-like of int): Compact indices (positions in keys) of the endpoints of every edge
+        '''
+        self.keys = np.asarray(keys, dtype=np.int64).reshape(-1)
+        self.key_index = {int(key): index for index, key in enumerate(self.keys)}
+
+        self.src = np.asarray(src, dtype=np.int32).reshape(-1)
+        self.dst = np.asarray(dst, dtype=np.int32).reshape(-1)
+
+        # CSR adjacency and fingerprint, built on first use
+        self._indptr = None
+        self._indices = None
+        self._fingerprint = None
+
+    @classmethod
+    def from_edge_keys(cls, keys, edge_keys):
+        '''
+        Creates a GraphModel from the node keys and the edges given as pairs of node keys
+
+        Parameters:
+            - keys (array-like of int): The key of every node, in node order
+            - edge_keys (array-like of int): Array of shape (m, 2), every row holds the keys of the endpoints of an edge
+
+        Returns:
+            - GraphModel: The created model
+        '''
+        keys = np.asarray(keys, dtype=np.int64).reshape(-1)
+        edge_keys = np.asarray(edge_keys, dtype=np.int64).reshape(-1, 2)
+
+        # Map keys to compact indices with a binary search over the sorted keys
+        sorter = np.argsort(keys, kind='stable')
+        positions = sorter[np.searchsorted(keys, edge_keys, sorter=sorter)] if len(keys) else edge_keys
+
+        return cls(keys, positions[:, 0], positions[:, 1])
+
+    @classmethod
+    def from_scene(cls, nodes, edges):
+        '''
+        Creates a GraphModel from the graphic items of the graph. Only reads the key attributes of the items
+
+        Parameters:
+            - nodes (list of NodeObject): The nodes of the graph
+            - edges (list of EdgeObject): The edges of the graph
+
+        Returns:
+            - GraphModel: The created model
+        '''
+        keys = np.fromiter((node.key for node in nodes), dtype=np.int64, count=len(nodes))
+
+        edge_keys = np.fromiter((key for edge in edges for key in (edge.node1.key, edge.node2.key)),
+                                dtype=np.int64, count=2 * len(edges))
+
+        return cls.from_edge_keys(keys, edge_keys)
+
+    @classmethod
+    def from_graph_data(cls, graph_data):
+        '''
+        Creates a GraphModel from graph data in the json format written by fileIO.save_graph.
+        Nodes are keyed by their position, the same way load_graph numbers them
+
+        Parameters:
+            - graph_data (dictionary): Dictionary with nodes and edges lists
+
+        Returns:
+            - GraphModel: The created model
+        '''
+        n = len(graph_data.get('nodes', []))
+
+        # Edges are stored as pairs of node positions, skip malformed entries like load_graph does
+        edges = [edge for edge in graph_data.get('edges', []) if len(edge) == 2]
+        edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+
+        return cls(np.arange(n), edges[:, 0], edges[:, 1])
+
+    @property
+    def n(self):
+        '''Number of nodes'''
+        return len(self.keys)
+
+    @property
+    def m(self):
+        '''Number of edges'''
+        return len(self.src)
+
+    def csr(self):
+        '''
+        Returns the CSR adjacency of the graph. Every edge appears in the neighbor lists of both of its endpoints
+
+        Returns:
+            - indptr (numpy.ndarray): int64 array of size n + 1, neighbors of node i are indices[indptr[i]:indptr[i + 1]]
+            - indices (numpy.ndarray): int32 array of size 2m with the neighbor indices
+        '''
+        if self._indptr is None:
+            rows = np.concatenate((self.src, self.dst))
+            cols = np.concatenate((self.dst, self.src))
+
+            order = np.argsort(rows, kind='stable')
+
+            self._indices = cols[order]
+            self._indptr = np.zeros(self.n + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=self.n), out=self._indptr[1:])
+
+        return self._indptr, self._indices
+
+    def degrees(self):
+        '''
+        Returns:
+            - numpy.ndarray: The degree of every node
+        '''
+        indptr, _ = self.csr()
+        return np.diff(indptr)
+
+    def simple_edges(self, return_inverse=False):
+        '''
+        Returns the edges of the underlying simple graph: duplicate edges are merged and self-loops are dropped
+
+        Parameters:
+            - return_inverse (bool): Also return the simple edge of every edge of the model
+
+        Returns:
+            - u, v (numpy.ndarray): int32 arrays with the endpoints of every distinct edge, u < v
+            - inverse (numpy.ndarray): Only if return_inverse, index in u, v of every edge of the model, -1 for
+              self-loops
+        '''
+        u = np.minimum(self.src, self.dst).astype(np.int64)
+        v = np.maximum(self.src, self.dst).astype(np.int64)
+
+        # Encode every pair as a single integer to deduplicate them in one pass
+        keep = u != v
+        pairs, kept_inverse = np.unique(u[keep] * self.n + v[keep], return_inverse=True)
+
+        u, v = (pairs // max(self.n, 1)).astype(np.int32), (pairs % max(self.n, 1)).astype(np.int32)
+        if not return_inverse:
+            return u, v
+
+        inverse = np.full(self.m, -1, dtype=np.int64)
+        inverse[keep] = kept_inverse
+
+        return u, v, inverse
+
+    def fingerprint(self):
+        '''
+        Structural hash of the graph. Two models get the same digest when they have the same number of nodes and the
+        same edges between the same node positions, in any edge order and direction. Node keys are left out, so a
+        graph keeps its fingerprint when fileIO renumbers its nodes on save and load
+
+        Returns:
+            - digest (str): blake2b hex digest of the node count and the sorted edge list
+            - order (numpy.ndarray): Permutation that sorts the edges of the model into the canonical order hashed
+        '''
+        if self._fingerprint is None:
+            u = np.minimum(self.src, self.dst).astype(np.int64)
+            v = np.maximum(self.src, self.dst).astype(np.int64)
+            order = np.lexsort((v, u))
+
+            digest = blake2b(np.int64(self.n).tobytes(), digest_size=16)
+            digest.update(np.column_stack((u[order], v[order])).tobytes())
+
+            self._fingerprint = (digest.hexdigest(), order)
+
+        return self._fingerprint
+
+    def edge_keys(self):
+        '''
+        Returns:
+            - numpy.ndarray: Array of shape (m, 2) with the keys of the endpoints of every edge
+        '''
+        return np.column_stack((self.keys[self.src], self.keys[self.dst]))
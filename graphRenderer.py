@@ -0,0 +1,288 @@
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor, QPainterPath, QPen, QPolygonF
+from PyQt6.QtWidgets import QGraphicsItem
+
+from nodeObject import node_list
+
+# Graphs with more elements (nodes plus edges) than this are drawn by a GraphRenderer, set with set_batch_threshold
+BATCH_THRESHOLD = 5000
+batch_threshold = BATCH_THRESHOLD
+
+# Most nodes drawn with their icon in one paint, more visible nodes are drawn as points
+MAX_ICON_NODES = 5000
+
+# Most node keys drawn in one paint, the keys of more visible nodes would be unreadable anyway
+MAX_LABEL_NODES = 500
+
+# Offset of the key of a node from its position, as placed by NodeObject, and the margin of its text item
+LABEL_OFFSET = 15
+LABEL_MARGIN = 4
+
+
+def set_batch_threshold(elements):
+    '''
+    Sets the size above which graphs are drawn in batches, 0 always batches them
+
+    Parameters:
+        - elements (int): Number of nodes plus edges
+    '''
+    global batch_threshold
+    batch_threshold = max(int(elements), 0)
+
+
+def use_batched_rendering(elements, batched):
+    '''
+    Decides whether a graph is drawn in batches. Batching is switched off only once the graph has shrunk to half of
+    batch_threshold, so that editing a graph around the threshold doesn't move every item in and out of the scene
+
+    Parameters:
+        - elements (int): Number of nodes plus edges of the graph
+        - batched (bool): The graph is currently drawn in batches
+
+    Returns:
+        - bool: True if the graph should be drawn in batches
+    '''
+    if batched:
+        return elements > batch_threshold // 2
+
+    return elements > batch_threshold
+
+
+class GraphRenderer(QGraphicsItem):
+    '''
+    Custom QGraphicsItem class drawing a whole graph in one pass, used instead of a NodeObject and an EdgeObject item
+    per element once the graph is large. The NodeObjects and EdgeObjects still hold the graph, but stay out of the
+    scene. The edges are drawn as one cached QPainterPath and the nodes from an array of their centers, culled to the
+    exposed region.
+
+    Items are added to the scene only on demand: materialize puts a node and its edges back for the duration of a drag,
+    and the context menus and link clicks find nodes and edges with nodeAt and edgeAt
+
+    Attributes:
+        - view (GraphicView): The view holding the edges of the graph
+        - materialized (set of NodeObject): Nodes added to the scene as items, not drawn by the renderer
+        - nodes (list of NodeObject): The drawn nodes, in the order of centers
+        - edges (list of EdgeObject): The drawn edges, in the order of segments
+        - centers (numpy.ndarray): Array of shape (n, 2) with the center of every drawn node
+        - segments (numpy.ndarray): Array of shape (m, 2, 2) with the endpoints of every drawn edge
+        - half_extents (numpy.ndarray): Half of the width and height of the node icon
+        - pixmap (QPixmap): The node icon
+        - dirty (bool): True if the arrays have to be rebuilt from the graph before the next paint or lookup
+    '''
+
+    def __init__(self, view):
+        '''
+        Initialize a new instance of GraphRenderer
+
+        Parameters:
+            - view (GraphicView): The view holding the edges of the graph
+        '''
+        super().__init__()
+
+        self.view = view
+        self.materialized = set()
+
+        self.nodes = []
+        self.edges = []
+        self.centers = None
+        self.segments = None
+        self.half_extents = None
+        self.pixmap = None
+
+        self.edge_path = QPainterPath()
+        self.node_points = QPolygonF()
+        self.rect = QRectF()
+        self.dirty = True
+
+        self.edge_pen = QPen(QColor('#dbcdf0'), 1)
+        self.node_pen = QPen(QColor('#c1ecb4'), 4, cap=Qt.PenCapStyle.RoundCap)
+        self.node_pen.setCosmetic(True)
+        self.label_pen = QPen(QColor('white'))
+
+        # Below the items of materialized nodes and edges, exposedRect is needed for the culling
+        self.setZValue(0)
+        self.setFlag(QGraphicsItem.GraphicsItemFlag.ItemUsesExtendedStyleOption)
+
+    def invalidate(self):
+        '''Rebuilds the drawing from the graph before the next paint, called after every change of the graph'''
+        if not self.dirty:
+            self.prepareGeometryChange()
+            self.dirty = True
+
+        self.update()
+
+    def _rebuild(self):
+        '''Reads the positions of the nodes and the edges between them into arrays, once per batch of changes'''
+        import numpy as np
+
+        self.dirty = False
+        self.nodes = [node for node in node_list if node not in self.materialized]
+        self.edges = [edge for edge in self.view.edges
+                      if edge.node1 not in self.materialized and edge.node2 not in self.materialized]
+
+        # All nodes share the icon of pixmap_cache
+        self.pixmap = self.nodes[0].pixmap() if self.nodes else None
+        if self.pixmap is not None:
+            self.half_extents = np.array([self.nodes[0].half_width, self.nodes[0].half_height])
+        else:
+            self.half_extents = np.zeros(2)
+
+        positions = np.array([(node.x(), node.y()) for node in self.nodes], dtype=np.float64).reshape(-1, 2)
+        self.centers = positions + self.half_extents
+
+        index = {node: i for i, node in enumerate(self.nodes)}
+        pairs = np.array([(index[edge.node1], index[edge.node2]) for edge in self.edges], dtype=np.int64)
+        self.segments = self.centers[pairs.reshape(-1, 2)]
+
+        # Edges run between the centers, the icons drawn on top hide their ends
+        self.edge_path = QPainterPath()
+        for (x1, y1), (x2, y2) in self.segments.tolist():
+            self.edge_path.moveTo(x1, y1)
+            self.edge_path.lineTo(x2, y2)
+
+        self.node_points = QPolygonF([QPointF(x, y) for x, y in self.centers.tolist()])
+
+        if self.nodes:
+            low = positions.min(axis=0) - LABEL_OFFSET
+            high = positions.max(axis=0) + 2 * self.half_extents + LABEL_OFFSET
+            self.rect = QRectF(QPointF(*low), QPointF(*high))
+        else:
+            self.rect = QRectF()
+
+    def boundingRect(self):
+        if self.dirty:
+            self._rebuild()
+
+        return self.rect
+
+    def paint(self, painter, option, widget=None):
+        '''
+        Draws the edges, the nodes and, when few enough are visible, the node keys
+
+        Parameters:
+            - painter (QPainter): The painter of the view
+            - option (QStyleOptionGraphicsItem): Holds the exposed region of the item
+            - widget (QWidget): The viewport
+        '''
+        import numpy as np
+
+        if self.dirty:
+            self._rebuild()
+
+        painter.setPen(self.edge_pen)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawPath(self.edge_path)
+
+        # Nodes whose icon reaches into the exposed region
+        exposed = option.exposedRect
+        x, y = self.centers[:, 0], self.centers[:, 1]
+        half_width, half_height = self.half_extents
+        visible = np.flatnonzero((x >= exposed.left() - half_width) & (x <= exposed.right() + half_width) &
+                                 (y >= exposed.top() - half_height) & (y <= exposed.bottom() + half_height))
+        if not len(visible):
+            return
+
+        if self.pixmap is not None and not self.pixmap.isNull() and len(visible) <= MAX_ICON_NODES:
+            for left, top in (self.centers[visible] - self.half_extents).tolist():
+                painter.drawPixmap(QPointF(left, top), self.pixmap)
+        else:
+            painter.setPen(self.node_pen)
+            painter.drawPoints(self.node_points)
+
+        if len(visible) <= MAX_LABEL_NODES:
+            painter.setPen(self.label_pen)
+            ascent = painter.fontMetrics().ascent()
+            for i, (left, top) in zip(visible.tolist(), (self.centers[visible] - self.half_extents).tolist()):
+                painter.drawText(QPointF(left - LABEL_OFFSET + LABEL_MARGIN, top - LABEL_OFFSET + LABEL_MARGIN + ascent),
+                                 str(self.nodes[i].key))
+
+    def nodeAt(self, pos, tolerance=0.0):
+        '''
+        Finds the drawn node under a position
+
+        Parameters:
+            - pos (QPointF): The position in scene coordinates
+            - tolerance (float): Distance in scene units a position may lie outside the icon
+
+        Returns:
+            - NodeObject: The topmost node under pos, None if there is none
+        '''
+        import numpy as np
+
+        if self.dirty:
+            self._rebuild()
+
+        half_width, half_height = self.half_extents + tolerance
+        hits = np.flatnonzero((np.abs(self.centers[:, 0] - pos.x()) <= half_width) &
+                              (np.abs(self.centers[:, 1] - pos.y()) <= half_height))
+
+        # Later nodes are drawn on top
+        return self.nodes[hits[-1]] if len(hits) else None
+
+    def edgeAt(self, pos, tolerance):
+        '''
+        Finds the drawn edge closest to a position
+
+        Parameters:
+            - pos (QPointF): The position in scene coordinates
+            - tolerance (float): Largest distance in scene units between pos and the edge
+
+        Returns:
+            - EdgeObject: The closest edge within tolerance, None if there is none
+        '''
+        import numpy as np
+
+        if self.dirty:
+            self._rebuild()
+
+        if not self.edges:
+            return None
+
+        # Distance from pos to the closest point of every segment
+        start, direction = self.segments[:, 0], self.segments[:, 1] - self.segments[:, 0]
+        offset = np.array([pos.x(), pos.y()]) - start
+        length = np.einsum('ij,ij->i', direction, direction)
+        t = np.clip(np.einsum('ij,ij->i', offset, direction) / np.where(length > 0, length, 1), 0, 1)
+        distance = np.linalg.norm(offset - t[:, None] * direction, axis=1)
+
+        closest = int(np.argmin(distance))
+        return self.edges[closest] if distance[closest] <= tolerance else None
+
+    def materialize(self, node):
+        '''
+        Adds a node, its key and its edges to the scene as items, so they can be dragged
+
+        Parameters:
+            - node (NodeObject): The node
+        '''
+        if node in self.materialized:
+            return
+
+        self.materialized.add(node)
+        scene = self.scene()
+
+        scene.addItem(node)
+        scene.addItem(node.graphic_key)
+        for edge in node.edges:
+            if edge.scene() is None:
+                edge.updatePosition()
+                scene.addItem(edge)
+
+        self.invalidate()
+
+    def release(self):
+        '''Takes the materialized nodes and their edges out of the scene again, the renderer draws them from now on'''
+        if not self.materialized:
+            return
+
+        scene = self.scene()
+        for node in self.materialized:
+            for edge in node.edges:
+                if edge.scene() is scene:
+                    scene.removeItem(edge)
+
+            scene.removeItem(node)
+            scene.removeItem(node.graphic_key)
+
+        self.materialized.clear()
+        self.invalidate()
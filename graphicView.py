@@ -3,9 +3,17 @@ from PyQt6.QtGui import QPainter
 from PyQt6.QtWidgets import QGraphicsView, QGraphicsScene, QMenu
 
 from edgeObject import EdgeObject
+from factorizationCache import factorization_cache
+from graphRenderer import GraphRenderer, use_batched_rendering
 from nodeObject import NodeObject, node_list
 from style_sheets import context_menu_style
 
+# Milliseconds between two updates of the edges of dragged nodes, roughly 60 frames per second
+FRAME_INTERVAL = 16
+
+# Distance in pixels a click may miss a node or edge drawn by the GraphRenderer
+HIT_TOLERANCE = 4
+
 
 class GraphicView(QGraphicsView):
     '''
@@ -14,10 +22,14 @@ class GraphicView(QGraphicsView):
     Attributes:
         - main_window (QMainWindow): The main window of the app
         - scene (QGraphicsScene): Place to display the graph
-        - edges (list of EdgeObject): List to keep track of connected edges
+        - edges (dictionary): The EdgeObjects of the graph as keys, in insertion order, so that deleting one is O(1)
+        - graph_model (GraphModel): Cached array snapshot of the graph, None when it has to be rebuilt
+        - live_centrality (IncrementalSpanningBetweenness): Centralities updated on every edit, None when live update is off
+        - renderer (GraphRenderer): Draws the whole graph while it is large, None while every element is an item
         - zoom_factor (float): Zoom factor for zooming operations
         - zoom_level (int): Zoom level
-        - timer (QTimer): Timer to continuously update the view
+        - moved_nodes (set of NodeObject): Nodes dragged since the last frame, their edges haven't followed yet
+        - frame_timer (QTimer): Single shot timer running only while moved_nodes is not empty
     '''
     def __init__(self, main_window):
         '''
@@ -44,7 +56,10 @@ class GraphicView(QGraphicsView):
         self.setScene(self.scene)
         self.setSceneRect(0, 0, 1200, 1000)
 
-        self.edges = []
+        self.edges = {}
+        self.graph_model = None
+        self.live_centrality = None
+        self.renderer = None
 
         # Set scroll hand drag mode for panning
         self.setDragMode(QGraphicsView.DragMode.ScrollHandDrag)
@@ -53,10 +68,15 @@ class GraphicView(QGraphicsView):
         self.zoom_factor = 1.2
         self.zoom_level = 0
 
-        # Create a QTimer to continuously update the view
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.updateView)
-        self.timer.start(16)  # 16 ms, which is roughly 60 frames per second
+        # Items invalidate only their own regions when they change, nothing repaints while the graph is idle
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+
+        # Edges follow dragged nodes once per frame instead of on every mouse move event
+        self.moved_nodes = set()
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.setInterval(FRAME_INTERVAL)
+        self.frame_timer.timeout.connect(self.updateMovedNodes)
 
     def wheelEvent(self, event):
         '''Handle wheel events for zooming'''
@@ -69,9 +89,151 @@ class GraphicView(QGraphicsView):
         self.zoom_level += 1 if factor > 1 else -1
 
     def updateView(self):
-        '''Updates the visual display of the graph'''
+        '''Repaints the whole scene once, after changes that bypass the items'''
         self.scene.update()
 
+    def nodeMoved(self, node):
+        '''
+        Schedules the edges of a dragged node to follow it on the next frame
+
+        Parameters:
+            - node (NodeObject): The moved node
+        '''
+        self.moved_nodes.add(node)
+
+        if not self.frame_timer.isActive():
+            self.frame_timer.start()
+
+    def updateMovedNodes(self):
+        '''Moves the edges of the nodes dragged since the last frame, every edge once'''
+        moved_nodes, self.moved_nodes = self.moved_nodes, set()
+
+        for edge in set().union(*(node.edges for node in moved_nodes)):
+            edge.updatePosition()
+
+    def showItems(self, *items):
+        '''
+        Adds new nodes, keys or edges to the scene, or has the GraphRenderer draw them while the graph is batched
+
+        Parameters:
+            - items (QGraphicsItem): The new items
+        '''
+        if self.renderer is not None:
+            self.renderer.invalidate()
+            return
+
+        for item in items:
+            self.scene.addItem(item)
+
+    def hideItems(self, *items):
+        '''
+        Removes deleted nodes, keys or edges from the scene and from the drawing of the GraphRenderer
+
+        Parameters:
+            - items (QGraphicsItem): The deleted items
+        '''
+        for item in items:
+            if item.scene() is self.scene:
+                self.scene.removeItem(item)
+
+        if self.renderer is not None:
+            self.renderer.materialized.difference_update(items)
+            self.renderer.invalidate()
+
+    def updateRenderMode(self, elements=None):
+        '''
+        Switches between an item per node and edge and the batched GraphRenderer when the graph crosses the size set
+        with graphRenderer.set_batch_threshold. Called by every method that changes the size of the graph
+
+        Parameters:
+            - elements (int): Number of nodes plus edges to decide for, None for the current graph
+        '''
+        if elements is None:
+            elements = len(node_list) + len(self.edges)
+
+        batched = use_batched_rendering(elements, self.renderer is not None)
+        if batched == (self.renderer is not None):
+            return
+
+        if batched:
+            for edge in self.edges:
+                self.scene.removeItem(edge)
+            for node in node_list:
+                self.scene.removeItem(node)
+                self.scene.removeItem(node.graphic_key)
+
+            self.renderer = GraphRenderer(self)
+            self.scene.addItem(self.renderer)
+        else:
+            self.renderer.release()
+            self.scene.removeItem(self.renderer)
+            self.renderer = None
+
+            for node in node_list:
+                self.scene.addItem(node)
+                self.scene.addItem(node.graphic_key)
+            for edge in self.edges:
+                edge.updatePosition()
+                self.scene.addItem(edge)
+
+    def graphItemAt(self, pos):
+        '''
+        Finds the node or edge under a position of the viewport, including the ones drawn by the GraphRenderer
+
+        Parameters:
+            - pos (QPoint): The position in viewport coordinates
+
+        Returns:
+            - QGraphicsItem: The item under pos, None if there is none
+        '''
+        item = self.itemAt(pos)
+        if not isinstance(item, GraphRenderer):
+            return item
+
+        scene_pos = self.mapToScene(pos)
+        tolerance = HIT_TOLERANCE / self.transform().m11()
+
+        return item.nodeAt(scene_pos, tolerance) or item.edgeAt(scene_pos, tolerance)
+
+    def graphModel(self):
+        '''
+        Returns the array snapshot of the graph used by the algorithms. The snapshot is rebuilt only after the graph
+        has changed
+
+        Returns:
+            - GraphModel: The model of the current graph
+        '''
+        # Imported on first use, together with numpy
+        from graphModel import GraphModel
+
+        if self.graph_model is None:
+            self.graph_model = GraphModel.from_scene(node_list, self.edges)
+
+        return self.graph_model
+
+    def invalidateGraphModel(self):
+        '''
+        Drops the cached GraphModel and with it the fingerprint that keys the cached results, together with the
+        factorisations of the old graph. Called by every method that changes the nodes or edges of the graph
+        '''
+        self.graph_model = None
+        factorization_cache.clear()
+
+    def updateLiveCentrality(self, change, *keys):
+        '''
+        Applies an edit of the graph to the live centralities, if live update is on, and refreshes the side dock
+
+        Parameters:
+            - change (str): Name of the IncrementalSpanningBetweenness method applying the edit
+            - keys (int): Keys of the nodes the edit applies to
+        '''
+        if self.live_centrality is None:
+            return
+
+        from centralityWorker import show_live_centrality
+        getattr(self.live_centrality, change)(*keys)
+        show_live_centrality(self.main_window)
+
     def contextMenu(self, pos):
         '''
         Decide which of the 3 context menus to display based on the clicked position
@@ -79,7 +241,7 @@ class GraphicView(QGraphicsView):
         Parameters:
             - pos (QPointF): position where the user right-clicked
         '''
-        item = self.itemAt(pos)
+        item = self.graphItemAt(pos)
         if item is None:
             self.showEmptySpaceContextMenu(pos)
         elif isinstance(item, NodeObject):
@@ -151,8 +313,15 @@ class GraphicView(QGraphicsView):
 
         new_edge = EdgeObject(node1, node2)
         new_edge.setZValue(1)
-        self.edges.append(new_edge)
-        self.scene.addItem(new_edge)
+        self.edges[new_edge] = None
+
+        # Index the edge at both endpoints, dragging a node then only moves its own edges
+        node1.edges.add(new_edge)
+        node2.edges.add(new_edge)
+        self.showItems(new_edge)
+        self.updateRenderMode()
+        self.invalidateGraphModel()
+        self.updateLiveCentrality('add_edge', node1.key, node2.key)
 
         self.main_window.statusBar().showMessage(f'Nodes: {len(node_list)} | Edges: {len(self.edges)}')
         self.main_window.saved = False
@@ -165,11 +334,18 @@ class GraphicView(QGraphicsView):
             - link (EdgeObject): Link to delete
         '''
 
-        self.scene.removeItem(link)
-        self.edges.remove(link)
+        self.hideItems(link)
+        del self.edges[link]
+        link.node1.edges.discard(link)
+        link.node2.edges.discard(link)
 
-        link.node1.neighbors.discard(link.node2)
-        link.node2.neighbors.discard(link.node1)
+        # The nodes stay neighbors while a parallel edge still connects them
+        if not any(link.node2 in (edge.node1, edge.node2) for edge in link.node1.edges):
+            link.node1.neighbors.discard(link.node2)
+            link.node2.neighbors.discard(link.node1)
+        self.updateRenderMode()
+        self.invalidateGraphModel()
+        self.updateLiveCentrality('delete_edge', link.node1.key, link.node2.key)
 
         self.main_window.statusBar().showMessage(f'Nodes: {len(node_list)} | Edges: {len(self.edges)}')
         self.main_window.saved = False
@@ -192,22 +368,83 @@ class GraphicView(QGraphicsView):
         if not self.main_window.graphic_view.transform().isIdentity():
             scene_pos = self.main_window.graphic_view.mapToScene(pos)
 
-        if not node_list:
-            new_node = NodeObject(0, scene_pos.x(), scene_pos.y(), "Icons\\node.png", self.edges)
-        else:
-            new_node = NodeObject(node_list[-1].key + 1, scene_pos.x(), scene_pos.y(), "Icons\\node.png", self.edges)
+        new_node = NodeObject(node_list.next_key(), scene_pos.x(), scene_pos.y(), "Icons\\node.png")
         node_list.append(new_node)
 
         new_node.setZValue(2)
-        self.scene.addItem(new_node)
 
         # Add text item for the number-key next to the node
         new_node.graphic_key.setZValue(2)
-        self.scene.addItem(new_node.graphic_key)
+        self.showItems(new_node, new_node.graphic_key)
+        self.updateRenderMode()
+        self.invalidateGraphModel()
+        self.updateLiveCentrality('add_node', new_node.key)
 
         self.main_window.statusBar().showMessage(f'Nodes: {len(node_list)} | Edges: {len(self.edges)}')
         self.main_window.saved = False
 
+    def addGraph(self, positions, edge_pairs):
+        '''
+        Adds many nodes and the edges between them at once, numbering the nodes after the existing ones. Unlike a call of
+        addNode and addLink per element, the scene isn't indexed and emits no signals during the load, and the model,
+        the live centralities and the status bar are updated once
+
+        Parameters:
+            - positions (sequence of (float, float)): Scene coordinates of the top left corner of every new node
+            - edge_pairs (sequence of (int, int)): Every new edge as the positions of its endpoints in positions
+
+        Returns:
+            - list of NodeObject: The new nodes, in the order of positions
+        '''
+        positions = list(positions)
+        edge_pairs = list(edge_pairs)
+
+        # The render mode is switched for the final size first, so the new items are created in the right place
+        self.updateRenderMode(len(node_list) + len(self.edges) + len(positions) + len(edge_pairs))
+
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
+        self.scene.blockSignals(True)
+
+        try:
+            new_nodes = []
+            for key, (x, y) in enumerate(positions, node_list.next_key()):
+                new_node = NodeObject(key, x, y, "Icons\\node.png")
+                new_node.setZValue(2)
+                new_node.graphic_key.setZValue(2)
+
+                node_list.append(new_node)
+                new_nodes.append(new_node)
+
+            new_edges = []
+            for u, v in edge_pairs:
+                node1, node2 = new_nodes[u], new_nodes[v]
+                node1.neighbors.add(node2)
+                node2.neighbors.add(node1)
+
+                new_edge = EdgeObject(node1, node2)
+                new_edge.setZValue(1)
+                self.edges[new_edge] = None
+                node1.edges.add(new_edge)
+                node2.edges.add(new_edge)
+                new_edges.append(new_edge)
+
+            self.showItems(*(item for node in new_nodes for item in (node, node.graphic_key)), *new_edges)
+        finally:
+            self.scene.blockSignals(False)
+
+            # The index is rebuilt once, on the first lookup after the load
+            self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.BspTreeIndex)
+
+        self.invalidateGraphModel()
+        if self.live_centrality is not None:
+            from centralityWorker import toggle_live_centrality
+            toggle_live_centrality(self.main_window, True)
+
+        self.main_window.statusBar().showMessage(f'Nodes: {len(node_list)} | Edges: {len(self.edges)}')
+        self.main_window.saved = False
+
+        return new_nodes
+
     def deleteNode(self, node):
         '''
         Delete a node and update the status bar accordingly
@@ -216,26 +453,28 @@ class GraphicView(QGraphicsView):
             - node (NodeObject): node to delete
         '''
 
-        # Remove only the edges connected to the deleted node
-        if node is not None:
-            for edge in self.edges.copy():  # Use copy to avoid modifying the list during iteration
-                if edge.node1 == node or edge.node2 == node:
-                    self.scene.removeItem(edge)
-                    self.edges.remove(edge)
+        # Remove only the edges connected to the deleted node, found through its own index
+        for edge in list(node.edges):
+            self.hideItems(edge)
+            del self.edges[edge]
+
+            other_node = edge.node2 if edge.node1 is node else edge.node1
+            other_node.edges.discard(edge)
+        node.edges.clear()
 
         # Remove the node from the scene and the list of nodes
-        self.scene.removeItem(node)
-        self.scene.removeItem(node.graphic_key)
+        self.hideItems(node, node.graphic_key)
 
         # Remove the Node instance from node_list
         node_list.remove(node)
 
-        # Clear the edges list from the deleted node
-        node.neighbors.clear()
-
-        # Remove the deleted node from the neighbor sets of other nodes
-        for other_node in node_list:
+        # Remove the deleted node from the neighbor sets of its neighbors only
+        for other_node in list(node.neighbors):
             other_node.neighbors.discard(node)
+        node.neighbors.clear()
+        self.updateRenderMode()
+        self.invalidateGraphModel()
+        self.updateLiveCentrality('delete_node', node.key)
 
         self.main_window.statusBar().showMessage(f'Nodes: {len(node_list)} | Edges: {len(self.edges)}')
         self.main_window.saved = False
@@ -260,16 +499,10 @@ class GraphicView(QGraphicsView):
         '''
 
         destination_node = self.scene.itemAt(pos.x(), pos.y(), self.transform())
+        if isinstance(destination_node, GraphRenderer):
+            destination_node = destination_node.nodeAt(pos, HIT_TOLERANCE / self.transform().m11())
         if isinstance(destination_node, NodeObject) and destination_node != self.source_node:
-            self.source_node.neighbors.add(destination_node)
-            destination_node.neighbors.add(self.source_node)
-
-            new_edge = EdgeObject(self.source_node, destination_node)
-            self.edges.append(new_edge)
-            self.scene.addItem(new_edge)
-
-            self.main_window.statusBar().showMessage(f'Nodes: {len(node_list)} | Edges: {len(self.edges)}')
-            self.main_window.saved = False
+            self.addLink(self.source_node, destination_node)
 
     def mousePressEvent(self, event):
         '''
@@ -288,8 +521,28 @@ class GraphicView(QGraphicsView):
             self.sceneMousePressEvent(scene_pos)
             self.source_node = None
         else:
+            # A node drawn by the renderer becomes an item for the drag, the scene then delivers the press to it
+            if self.renderer is not None and event.button() == Qt.MouseButton.LeftButton:
+                node = self.renderer.nodeAt(self.mapToScene(event.pos()), HIT_TOLERANCE / self.transform().m11())
+                if node is not None:
+                    self.renderer.materialize(node)
+
             super().mousePressEvent(event)
 
+    def mouseReleaseEvent(self, event):
+        '''
+        Event handler of the mouseReleaseEvent. Hands the nodes dragged while the graph is batched back to the renderer
+
+        Parameters:
+             - event (QMouseEvent)
+        '''
+        super().mouseReleaseEvent(event)
+
+        if self.renderer is not None:
+            # Edges of the dragged nodes still waiting for their frame are moved before the renderer reads them
+            self.updateMovedNodes()
+            self.renderer.release()
+
     def clearAll(self):
         '''
         Delete all nodes and edges of the graph and update the status bar accordingly
@@ -301,13 +554,19 @@ class GraphicView(QGraphicsView):
         if not self.main_window.saved and not save_dialog(self.main_window, 0):
             return 0
 
+        # Live update would rebuild the graph one edit at a time while a new one is loaded or generated
+        self.main_window.live_centrality_action.setChecked(False)
+
         self.scene.clear()
-        self.edges = []
+        self.renderer = None
+        self.edges = {}
+        self.moved_nodes.clear()
 
         # Reset the neighbor sets of all nodes
         for node in node_list:
             node.neighbors.clear()
 
         node_list.clear()
+        self.invalidateGraphModel()
 
         self.main_window.statusBar().showMessage(f'Nodes: {len(node_list)} | Edges: {len(self.edges)}')
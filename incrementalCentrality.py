@@ -0,0 +1,241 @@
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+from scipy.sparse.csgraph import connected_components
+
+from spanningEdgeBetweenness import get_laplacian_matrix
+
+# Largest graph kept incrementally, the dense inverse takes 8 n^2 bytes
+INCREMENTAL_MAX_NODES = 4000
+
+
+class IncrementalSpanningBetweenness:
+    '''
+    Keeps the Spanning Edge Betweenness of a graph up to date while edges and nodes are added and deleted.
+
+    It stores the inverse of M = L + P, where L is the Laplacian of the simple graph and P holds 1/|C| on every pair of
+    nodes of the same connected component C. M is positive definite and L^+ = M^-1 - P, so the effective resistance of
+    an edge {u, v} is M^-1(u,u) + M^-1(v,v) - 2 M^-1(u,v). Every edit changes M by a term of rank at most 3, applied to
+    M^-1 with the Sherman-Morrison-Woodbury formula in O(n^2) instead of a new O(n^3) inversion.
+
+    Attributes:
+        - key_index (dictionary): Maps a node key to its row in inverse
+        - keys (list of int): The key of every row
+        - inverse (numpy.ndarray): M^-1
+        - labels (numpy.ndarray): Connected component of every row
+        - neighbors (list of dictionaries): For every row, the neighbor rows and the number of edges to each
+    '''
+
+    def __init__(self, model):
+        '''
+        Initialize a new instance of IncrementalSpanningBetweenness, inverting M once
+
+        Parameters:
+            - model (GraphModel): The graph
+        '''
+        self.keys = model.keys.tolist()
+        self.key_index = {key: index for index, key in enumerate(self.keys)}
+
+        self.neighbors = [{} for _ in self.keys]
+        for u, v in zip(model.src.tolist(), model.dst.tolist()):
+            if u != v:
+                self.neighbors[u][v] = self.neighbors[u].get(v, 0) + 1
+                self.neighbors[v][u] = self.neighbors[v].get(u, 0) + 1
+
+        laplacian_matrix = get_laplacian_matrix(model)
+        _, self.labels = connected_components(laplacian_matrix, directed=False)
+
+        # P has 1 / |C| on every pair of nodes of the same component
+        sizes = np.bincount(self.labels)
+        same = self.labels[:, None] == self.labels[None, :]
+        M = laplacian_matrix.toarray() + same / sizes[self.labels][:, None]
+
+        self.inverse = cho_solve(cho_factor(M), np.eye(len(self.keys))) if self.keys else np.zeros((0, 0))
+
+    def _update(self, U, C):
+        '''
+        Applies M += U C U^T to the inverse with the Woodbury formula in the form that allows a singular C
+
+        Parameters:
+            - U (numpy.ndarray): Matrix of shape (n, r)
+            - C (numpy.ndarray): Matrix of shape (r, r)
+        '''
+        MU = self.inverse @ U
+        S = np.eye(U.shape[1]) + C @ (U.T @ MU)
+        self.inverse -= MU @ np.linalg.solve(S, C @ MU.T)
+
+    def _indicator(self, label):
+        '''
+        Returns:
+            - numpy.ndarray: Vector with 1 on the nodes of the component and 0 elsewhere
+        '''
+        return (self.labels == label).astype(float)
+
+    def _component_change(self, b, sign, first, second, merged):
+        '''
+        Applies M += sign * b b^T together with the change of P when two components merge into one, or one splits in two
+
+        Parameters:
+            - b (numpy.ndarray): e_u - e_v of the edge
+            - sign (int): 1 when the edge is added, -1 when it is deleted
+            - first, second (numpy.ndarray): Indicator vectors of the two separate components
+            - merged (bool): True if the components merge, False if they split
+        '''
+        a, c = first.sum(), second.sum()
+        total = a + c
+
+        # 1_A 1_A^T / a + 1_B 1_B^T / b - (1_A + 1_B)(1_A + 1_B)^T / (a + b) expressed on the basis [1_A, 1_B]
+        K = np.array([[1 / a - 1 / total, -1 / total], [-1 / total, 1 / c - 1 / total]])
+        if merged:
+            K = -K
+
+        C = np.zeros((3, 3))
+        C[0, 0] = sign
+        C[1:, 1:] = K
+
+        self._update(np.column_stack((b, first, second)), C)
+
+    def _edge_vector(self, u, v):
+        b = np.zeros(len(self.keys))
+        b[u], b[v] = 1.0, -1.0
+        return b
+
+    def add_node(self, key):
+        '''
+        Adds an isolated node, its row of M^-1 is e_u
+
+        Parameters:
+            - key (int): Key of the new node
+        '''
+        n = len(self.keys)
+
+        inverse = np.zeros((n + 1, n + 1))
+        inverse[:n, :n] = self.inverse
+        inverse[n, n] = 1.0
+        self.inverse = inverse
+
+        self.labels = np.append(self.labels, self.labels.max() + 1 if n else 0)
+        self.keys.append(key)
+        self.key_index[key] = n
+        self.neighbors.append({})
+
+    def delete_node(self, key):
+        '''
+        Deletes a node and its edges
+
+        Parameters:
+            - key (int): Key of the node
+        '''
+        u = self.key_index[key]
+
+        for v in list(self.neighbors[u]):
+            for _ in range(self.neighbors[u][v]):
+                self.delete_edge(key, self.keys[v])
+
+        # The node is isolated now, so its row and column of M^-1 are e_u and can simply be dropped
+        self.inverse = np.delete(np.delete(self.inverse, u, axis=0), u, axis=1)
+        self.labels = np.delete(self.labels, u)
+        del self.keys[u]
+        del self.neighbors[u]
+
+        # Shift the rows after u
+        self.neighbors = [{v - (v > u): count for v, count in neighbors.items()} for neighbors in self.neighbors]
+        self.key_index = {key: index for index, key in enumerate(self.keys)}
+
+    def add_edge(self, key1, key2):
+        '''
+        Adds an edge
+
+        Parameters:
+            - key1, key2 (int): Keys of the endpoints
+        '''
+        u, v = self.key_index[key1], self.key_index[key2]
+        if u == v:
+            return
+
+        count = self.neighbors[u].get(v, 0)
+        self.neighbors[u][v] = self.neighbors[v][u] = count + 1
+
+        # A duplicate edge doesn't change the simple graph
+        if count:
+            return
+
+        b = self._edge_vector(u, v)
+
+        if self.labels[u] == self.labels[v]:
+            # Sherman-Morrison update of M += b b^T
+            w = self.inverse @ b
+            self.inverse -= np.outer(w, w) / (1 + b @ w)
+            return
+
+        first, second = self._indicator(self.labels[u]), self._indicator(self.labels[v])
+        self._component_change(b, 1, first, second, merged=True)
+        self.labels[self.labels == self.labels[v]] = self.labels[u]
+
+    def delete_edge(self, key1, key2):
+        '''
+        Deletes an edge
+
+        Parameters:
+            - key1, key2 (int): Keys of the endpoints
+        '''
+        u, v = self.key_index[key1], self.key_index[key2]
+        if u == v or v not in self.neighbors[u]:
+            return
+
+        count = self.neighbors[u][v] - 1
+        if count:
+            self.neighbors[u][v] = self.neighbors[v][u] = count
+            return
+
+        del self.neighbors[u][v]
+        del self.neighbors[v][u]
+
+        b = self._edge_vector(u, v)
+        side = self._reachable(u)
+
+        if side[v]:
+            # Sherman-Morrison update of M -= b b^T, the component stays connected
+            w = self.inverse @ b
+            self.inverse += np.outer(w, w) / (1 - b @ w)
+            return
+
+        # The edge was a bridge, its component splits into the side of u and the side of v
+        component = self.labels == self.labels[u]
+        first = side.astype(float)
+        second = (component & ~side).astype(float)
+
+        self._component_change(b, -1, first, second, merged=False)
+        self.labels[component & ~side] = self.labels.max() + 1
+
+    def _reachable(self, start):
+        '''
+        Returns:
+            - numpy.ndarray: bool mask of the nodes reachable from start
+        '''
+        seen = np.zeros(len(self.keys), dtype=bool)
+        seen[start] = True
+        stack = [start]
+
+        while stack:
+            for neighbor in self.neighbors[stack.pop()]:
+                if not seen[neighbor]:
+                    seen[neighbor] = True
+                    stack.append(neighbor)
+
+        return seen
+
+    def centralities(self, model):
+        '''
+        Reads the Spanning Edge Betweenness of every edge of the model from M^-1, O(m)
+
+        Parameters:
+            - model (GraphModel): The current graph, with the same nodes and edges as the tracked one
+
+        Returns:
+            - numpy.ndarray: The centrality of every edge, in the edge order of the model
+        '''
+        rows = np.array([self.key_index[key] for key in model.keys.tolist()], dtype=np.int64)
+        u, v = rows[model.src], rows[model.dst]
+
+        diagonal = self.inverse.diagonal()
+        return diagonal[u] + diagonal[v] - 2 * self.inverse[u, v]
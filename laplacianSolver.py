@@ -0,0 +1,244 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import cho_solve
+from scipy.sparse.linalg import LinearOperator, cg, spilu, splu
+
+import parallelSolver
+from factorizationCache import factorization_cache
+from graphDecomposition import report_nothing
+from parallelSolver import parallel_enabled, solve_columns
+from spanningEdgeBetweenness import ground_laplacian, grounded_laplacian, upper_cholesky
+
+# Largest grounded Laplacian that the auto method factorises densely, bigger ones are solved with conjugate gradient
+DIRECT_SOLVER_LIMIT = 4000
+
+
+class LaplacianSolver:
+    '''
+    Solves Laplacian systems LZ = Y of a graph. The Laplacian is grounded per connected component, the grounded nodes
+    get potential 0, which leaves every potential difference inside a component unchanged.
+
+    Backends:
+        - direct: Dense Cholesky factorisation computed once, O(n^3) to build and O(n^2) per right hand side
+        - cg: Preconditioned conjugate gradient over the sparse Laplacian, O(m) per iteration
+
+    Preconditioners of cg:
+        - jacobi: The default. Inverse of the diagonal, free to build and apply, and the fastest on well connected,
+          expander-like graphs where conjugate gradient converges in few iterations anyway
+        - ichol: Incomplete Cholesky factorisation, cached per graph. Cuts the iterations on poorly conditioned,
+          mesh-like or path-like graphs, but every iteration costs two sparse triangular solves and the factorisation
+          fills in on dense random graphs. Only worth it when the iteration count under jacobi is high
+
+    Attributes:
+        - method (str): The backend in use, 'direct' or 'cg'
+        - keep (numpy.ndarray): Indices of the nodes that remain in the grounded matrix
+        - grounded (scipy.sparse.csr_matrix): The grounded Laplacian matrix
+        - tol (float): Relative residual tolerance of conjugate gradient
+        - maxiter (int): Iteration cap of conjugate gradient per right hand side, None for no cap
+        - preconditioner (str): Conjugate gradient preconditioner, 'jacobi', 'ichol' or None
+        - workers (int): Processes sharing the conjugate gradient solves, None for parallelSolver.worker_count
+        - converged (bool): False if a conjugate gradient solve stopped at the iteration cap
+    '''
+
+    def __init__(self, model, method='auto', tol=1e-6, maxiter=None, preconditioner='jacobi', laplacian_matrix=None,
+                 workers=None):
+        '''
+        Initialize a new instance of LaplacianSolver
+
+        Parameters:
+            - model (GraphModel): The graph
+            - method (str): 'direct', 'cg' or 'auto' to pick by the size of the graph
+            - tol (float): Relative residual tolerance of conjugate gradient
+            - maxiter (int): Iteration cap of conjugate gradient per right hand side, None for no cap
+            - preconditioner (str): Conjugate gradient preconditioner, 'jacobi', 'ichol' or None
+            - laplacian_matrix (scipy.sparse.csr_matrix): The sparse Laplacian of the graph. When not given, the grounded
+              Laplacian and its factorisation come from factorization_cache
+            - workers (int): Processes sharing the conjugate gradient solves of a block of right hand sides, None for
+              parallelSolver.worker_count
+        '''
+        if laplacian_matrix is None:
+            self._model = model
+            grounded, keep = grounded_laplacian(model)
+        else:
+            self._model = None
+            grounded, keep = ground_laplacian(model, laplacian_matrix)
+
+        self._prepare(grounded, keep, method, tol, maxiter, preconditioner, workers)
+
+    @classmethod
+    def from_grounded(cls, grounded, keep, method='auto', tol=1e-6, maxiter=None, preconditioner='jacobi',
+                      workers=None):
+        '''
+        Creates a LaplacianSolver for an already grounded Laplacian
+
+        Parameters:
+            - grounded (scipy.sparse.csr_matrix): The grounded Laplacian matrix
+            - keep (numpy.ndarray): Indices of the nodes that remain in the grounded matrix
+            - method, tol, maxiter, preconditioner, workers: As in __init__
+
+        Returns:
+            - LaplacianSolver: The created solver
+        '''
+        solver = cls.__new__(cls)
+        solver._model = None
+        solver._prepare(grounded, keep, method, tol, maxiter, preconditioner, workers)
+
+        return solver
+
+    def _prepare(self, grounded, keep, method, tol, maxiter, preconditioner, workers):
+        '''
+        Picks the backend and factorises the grounded Laplacian or builds the preconditioner
+
+        Parameters:
+            - grounded, keep: As in from_grounded
+            - method, tol, maxiter, preconditioner, workers: As in __init__
+        '''
+        self.grounded = sp.csr_matrix(grounded)
+        self.keep = keep
+
+        if method == 'auto':
+            method = 'direct' if len(self.keep) <= DIRECT_SOLVER_LIMIT else 'cg'
+        if method not in ('direct', 'cg'):
+            raise ValueError(f'Unknown Laplacian solver method: {method}')
+
+        self.method = method
+        self.tol = tol
+        self.maxiter = maxiter
+        self.preconditioner = preconditioner
+        self.workers = workers
+        self.converged = True
+
+        self._factor = None
+        self._preconditioner = None
+
+        if not len(self.keep):
+            return
+
+        if method == 'direct':
+            self._factor = (self._cached('cholesky', lambda: upper_cholesky(self.grounded)), False)
+        else:
+            self._preconditioner = self._build_preconditioner(preconditioner)
+
+    def _cached(self, kind, build):
+        '''
+        Builds a structure of the grounded Laplacian through factorization_cache, or directly when the solver wasn't
+        created from a model
+
+        Parameters:
+            - kind (str): Name of the structure in the cache
+            - build (function): Called without arguments to build the structure
+
+        Returns:
+            - The structure
+        '''
+        if self._model is None:
+            return build()
+        return factorization_cache.get(self._model, kind, build)
+
+    def _build_preconditioner(self, preconditioner):
+        '''
+        Creates the preconditioner of conjugate gradient
+
+        Parameters:
+            - preconditioner (str): 'jacobi', 'ichol' or None
+
+        Returns:
+            - LinearOperator: Applies the inverse of the preconditioner, None for no preconditioning
+        '''
+        size = len(self.keep)
+
+        if preconditioner is None:
+            return None
+
+        if preconditioner == 'jacobi':
+            inverse_diagonal = 1.0 / self.grounded.diagonal()
+            return LinearOperator((size, size), matvec=lambda x: inverse_diagonal * x.ravel())
+
+        if preconditioner == 'ichol':
+            lower, diagonal, perm_r, perm_c = self._cached('ichol', self._incomplete_cholesky)
+
+            # SuperLU of the triangular L in its natural order has no fill and no pivoting, its solve applies L and L^T
+            # in compiled code instead of two Python level spsolve_triangular calls per iteration
+            triangular = splu(lower.tocsc(), permc_spec='NATURAL', diag_pivot_thresh=0.0)
+
+            def apply(x):
+                permuted = np.empty(size)
+                permuted[perm_r] = x.ravel()
+                y = triangular.solve(permuted)
+                y = triangular.solve(y / diagonal, trans='T')
+                return y[perm_c]
+
+            return LinearOperator((size, size), matvec=apply)
+
+        raise ValueError(f'Unknown preconditioner: {preconditioner}')
+
+    def _incomplete_cholesky(self):
+        '''
+        Incomplete LU with symmetric ordering and no pivoting. On the grounded Laplacian, an M-matrix, U is close to
+        D L^T, so L D L^T is used as a symmetric positive definite incomplete Cholesky factorisation
+
+        Returns:
+            - lower (scipy.sparse.csr_matrix): Unit lower triangular L
+            - diagonal (numpy.ndarray): The diagonal D
+            - perm_r, perm_c (numpy.ndarray): Row and column permutations of the factorisation
+        '''
+        factor = spilu(self.grounded.tocsc(), drop_tol=1e-3, fill_factor=5, permc_spec='MMD_AT_PLUS_A',
+                       diag_pivot_thresh=0.0, options={'SymmetricMode': True})
+
+        lower = factor.L.tocsr()
+
+        return lower, factor.U.diagonal(), factor.perm_r, factor.perm_c
+
+    def solve(self, Y, out=None, progress=report_nothing):
+        '''
+        Solves LZ = Y for every column of Y
+
+        Parameters:
+            - Y (numpy.ndarray): Right hand sides of shape (n, k) or (n,), columns sum to zero on every component
+            - out (numpy.ndarray): Optional preallocated output of the same shape as Y
+            - progress (function): Progress callback, reports the fraction of solved columns
+
+        Returns:
+            - Z (numpy.ndarray): The solutions, with potential 0 on the grounded nodes
+        '''
+        Z = np.zeros(Y.shape) if out is None else out
+        Z.fill(0)
+
+        if not len(self.keep):
+            return Z
+
+        rhs = Y[self.keep]
+
+        if self.method == 'direct':
+            Z[self.keep] = cho_solve(self._factor, rhs)
+            return Z
+
+        # Conjugate gradient solves one column at a time, large blocks are shared out to the process pool
+        columns = rhs.reshape(len(self.keep), -1)
+
+        if columns.shape[1] > 1 and parallel_enabled(self.grounded.nnz, self.workers):
+            solution = solve_columns(self, columns, progress)
+        else:
+            solution = np.empty(columns.shape)
+
+            for j in range(columns.shape[1]):
+                progress('solve', j / columns.shape[1])
+                solution[:, j], info = cg(self.grounded, columns[:, j], rtol=self.tol, maxiter=self.maxiter,
+                                          M=self._preconditioner)
+                if info > 0:
+                    self.converged = False
+
+        Z[self.keep] = solution.reshape(rhs.shape)
+
+        return Z
+
+    @property
+    def parallel_columns(self):
+        '''
+        Returns:
+            - int: Number of right hand sides worth solving together, more than 1 when solve shares them out to the
+              process pool
+        '''
+        if self.method == 'cg' and parallel_enabled(self.grounded.nnz, self.workers):
+            return parallelSolver.resolve_workers(self.workers)
+        return 1
@@ -1,6 +1,13 @@
+import time
+
+# Taken before the imports of the app, the startup time includes them
+START_TIME = time.perf_counter()
+
+import argparse
 import sys
+import threading
 
-from PyQt6.QtCore import QEvent, Qt
+from PyQt6.QtCore import QEvent, Qt, QTimer
 from PyQt6.QtGui import QGuiApplication, QIcon
 from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QDockWidget
 
@@ -8,7 +15,9 @@ from centralityTable import CentralityTable
 from graphicView import GraphicView
 from mainMenu import create_main_menu
 from fileIO import save_dialog
+import graphRenderer
 from nodeObject import node_list
+import profiling
 from style_sheets import main_page_style, graphic_view_style, side_style, table_style
 
 
@@ -20,7 +29,11 @@ class Window(QMainWindow):
         - main_view (QWidget): The central widget of the window
         - graphic_view (GraphicView): Are to visually display the graph
         - main_menu (QMenuBar): The main menu of the app
+        - centrality_worker (CentralityWorker): The centrality computation running in the background, None when idle
+        - cancel_centrality_action (QAction): Menu action cancelling centrality_worker
+        - live_centrality_action (QAction): Checkable menu action turning the live Spanning Edge Betweenness on and off
         - side_label (QLabel): Label of the dock to display the name of the used algorithm
+        - profile_label (QLabel): Label of the dock to display the time and memory of every phase of the last run
         - side_table (CentralityTable): The table of the dock to display the centrality of each edge
         - dock_widget (QDockWidget): Dock which contains side_label and side_table
     '''
@@ -55,6 +68,9 @@ class Window(QMainWindow):
         # Variable to indicate if the current graph has been saved
         self.saved = False
 
+        # Background centrality computation in progress, None when idle
+        self.centrality_worker = None
+
         # Create the main widget and layout
         self.main_view = QWidget(self)
         self.main_view.setStyleSheet(main_page_style)
@@ -86,11 +102,17 @@ class Window(QMainWindow):
         self.side_label = QLabel(side_widget)
         self.side_label.setStyleSheet('color: white;')
 
+        # Create a label to display the phase breakdown of the last run
+        self.profile_label = QLabel(side_widget)
+        self.profile_label.setStyleSheet('color: white; font-size: 10px;')
+        self.profile_label.setHidden(True)
+
         # Create an empty table to display centralities
-        self.side_table = CentralityTable({})
+        self.side_table = CentralityTable()
         self.side_table.setStyleSheet(table_style)
 
         side_layout.addWidget(self.side_label)
+        side_layout.addWidget(self.profile_label)
         side_layout.addWidget(self.side_table)
 
         # Create a dock widget
@@ -123,9 +145,58 @@ class Window(QMainWindow):
                 event.ignore()
 
 
+def warm_up():
+    '''
+    Imports the scientific modules in a background thread once the window is shown, so that the first Generate
+    Network or Centralities action doesn't wait for them
+    '''
+
+    def import_modules():
+        import networkx
+        import centralityWorker
+
+    threading.Thread(target=import_modules, daemon=True).start()
+
+
+def report_startup(quit_app):
+    '''
+    Prints the time from the start of the process until the window has been shown
+
+    Parameters:
+        - quit_app (bool): Quit right after printing, for measuring startup from scripts
+    '''
+
+    print(f'Startup: {time.perf_counter() - START_TIME:.3f} s', flush=True)
+
+    if quit_app:
+        QApplication.quit()
+
+
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    # App options, the remaining arguments are left to Qt
+    parser = argparse.ArgumentParser(description='NetCraft Insight')
+    parser.add_argument('--startup-time', action='store_true', help='Print the startup time and quit')
+    parser.add_argument('--no-warm-up', action='store_true', help="Don't import the scientific modules in the background")
+    parser.add_argument('--profile-log', help='Append the phase breakdown of every centrality run to this JSON-lines file')
+    parser.add_argument('--profile-memory', action='store_true', help='Measure the bytes allocated by every phase')
+    parser.add_argument('--batch-threshold', type=int, default=graphRenderer.BATCH_THRESHOLD,
+                        help='Draw graphs with more nodes plus edges than this in one pass, 0 to always batch them')
+    args, qt_args = parser.parse_known_args()
+
+    if args.profile_log:
+        profiling.add_hook(profiling.JsonLinesLog(args.profile_log))
+    profiling.set_memory_tracing(args.profile_memory)
+    graphRenderer.set_batch_threshold(args.batch_threshold)
+
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setStyle('Fusion')
     Gui = Window()
     Gui.show()
+
+    # Single shot timers run once the event loop has shown the window
+    if args.startup_time:
+        QTimer.singleShot(0, lambda: report_startup(True))
+    elif not args.no_warm_up:
+        QTimer.singleShot(0, warm_up)
+
     sys.exit(app.exec())
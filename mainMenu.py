@@ -1,17 +1,10 @@
-import networkx as nx
-import numpy as np
-from PyQt6.QtCore import QPointF
 from PyQt6.QtGui import QAction
 from PyQt6.QtWidgets import QMenu, QFileDialog
-from networkx import fruchterman_reingold_layout
 
-from fastTreeC import fastTreeC
 from netGenerationDialog import NetworkGenerationDialog
 from nodeObject import node_list
 from fileIO import save_graph, load_graph
-from spanningEdgeBetweenness import spanEdgeBetw
 from style_sheets import menu_style
-from treeC import treeC
 
 
 def create_main_menu(window):
@@ -80,7 +73,8 @@ def create_file_menu(main_menu, window):
 
 def create_centralities_menu(main_menu, window):
     '''
-    Creates the centralities submenu containing Spanning Edge Betweenness, TreeC, Fast-TreeC algorithms
+    Creates the centralities submenu containing Spanning Edge Betweenness, TreeC, Fast-TreeC algorithms, an action
+    to cancel the computation in progress and a toggle for the live Spanning Edge Betweenness
 
     Parameters:
         - window (QMainWindow): The main window of the app
@@ -97,20 +91,47 @@ def create_centralities_menu(main_menu, window):
     spanning_edge_btw = QAction('Spanning Edge Betweenness', centralities_submenu)
     treec = QAction('TreeC', centralities_submenu)
     fastTree = QAction('Fast-TreeC', centralities_submenu)
-
-    # Connect the created actions
-    spanning_edge_btw.triggered.connect(lambda: spanEdgeBetw(window, node_list))
-    treec.triggered.connect(lambda: treeC(window, node_list))
-    fastTree.triggered.connect(lambda: fastTreeC(window, node_list))
+    cancel = QAction('Cancel Computation', centralities_submenu)
+    cancel.setEnabled(False)
+    live = QAction('Live Update', centralities_submenu)
+    live.setCheckable(True)
+
+    # Connect the created actions, the algorithms run in a background worker
+    spanning_edge_btw.triggered.connect(lambda: centrality_action(window, 'run_centrality', 'spanning_edge_betweenness'))
+    treec.triggered.connect(lambda: centrality_action(window, 'run_centrality', 'treec'))
+    fastTree.triggered.connect(lambda: centrality_action(window, 'run_centrality', 'fast_treec'))
+    cancel.triggered.connect(lambda: centrality_action(window, 'cancel_centrality'))
+    live.toggled.connect(lambda enabled: centrality_action(window, 'toggle_live_centrality', enabled))
 
     # Add the actions to Centralities submenu
     centralities_submenu.addAction(spanning_edge_btw)
     centralities_submenu.addAction(treec)
     centralities_submenu.addAction(fastTree)
+    centralities_submenu.addSeparator()
+    centralities_submenu.addAction(cancel)
+    centralities_submenu.addAction(live)
+
+    window.cancel_centrality_action = cancel
+    window.live_centrality_action = live
 
     return centralities_submenu
 
 
+def centrality_action(window, action, *args):
+    '''
+    Calls a function of centralityWorker. The module, with numpy, scipy and the algorithms, is imported on the first
+    use of the Centralities menu instead of at startup
+
+    Parameters:
+        - window (QMainWindow): The main window of the app
+        - action (str): Name of the function in centralityWorker
+        - args: Further arguments of the function
+    '''
+
+    import centralityWorker
+    getattr(centralityWorker, action)(window, *args)
+
+
 def generate_net(window):
     '''
     Generates a random Erdos - Renyi graph in a Fruchterman_Reingold based on the user input of number of nodes and density
@@ -130,11 +151,14 @@ def generate_net(window):
         if not window.graphic_view.clearAll() and node_list:
             return
 
+        # networkx is imported on first use, it takes longer to import than the rest of the app
+        import networkx as nx
+
         # Generate Erdős-Rényi graph
         erdos_renyi_graph = nx.erdos_renyi_graph(nodes, density)
 
         # Get Fruchterman-Reingold layout
-        layout = fruchterman_reingold_layout(erdos_renyi_graph, scale=500)
+        layout = nx.fruchterman_reingold_layout(erdos_renyi_graph, scale=500)
 
         # Adjust layout coordinates to be positive
         min_x = min(layout.values(), key=lambda x: x[0])[0]
@@ -145,17 +169,9 @@ def generate_net(window):
             for node in layout:
                 layout[node] = (layout[node][0] - min_x, layout[node][1] - min_y)
 
-        # Add nodes to GraphicView using Fruchterman-Reingold layout positions
-        for node, pos in layout.items():
-            window.graphic_view.addNode(QPointF(pos[0], pos[1]))
-
-        # Add edges to the network
-        for edge in erdos_renyi_graph.edges:
-            node1 = node_list[edge[0]]
-            node2 = node_list[edge[1]]
-            window.graphic_view.addLink(node1, node2)
-
-        window.statusBar().showMessage(f'Nodes: {erdos_renyi_graph.number_of_nodes()} | Edges: {erdos_renyi_graph.number_of_edges()}')
+        # Add the nodes at their Fruchterman-Reingold layout positions and the edges in one batch, which also updates the
+        # status bar. Nodes of the generated graph are numbered 0 to n - 1 in the order of the layout
+        window.graphic_view.addGraph(layout.values(), erdos_renyi_graph.edges)
 
         # Update the view
         #window.graphic_view.fitInView(window.graphic_view.scene.sceneRect(), Qt.AspectRatioMode.KeepAspectRatio)
@@ -1,6 +1,8 @@
 from PyQt6.QtCore import QPointF, Qt
 from PyQt6.QtWidgets import QGraphicsPixmapItem, QGraphicsTextItem
-from PyQt6.QtGui import QPixmap, QColor
+from PyQt6.QtGui import QColor
+
+from pixmapCache import pixmap_cache
 
 
 class NodeObject(QGraphicsPixmapItem):
@@ -10,10 +12,11 @@ class NodeObject(QGraphicsPixmapItem):
     Attributes:
         - key (int): Node's key
         - neiboghbors (set of NodeObject): Stores all neighbors of the node
-        - edges (list of EdgeObject): List to keep track of connected edges
+        - edges (set of EdgeObject): The edges incident to this node, maintained by GraphicView
+        - half_width, half_height (float): Half of the size of the node image, the offset of its center from its position
         - graphic_key (QGraphicsTextItem): For visual representation of the key
     '''
-    def __init__(self, key, x, y, image_path, edges):
+    def __init__(self, key, x, y, image_path):
         '''
         Initialize a new instance of NodeObject
 
@@ -22,20 +25,20 @@ class NodeObject(QGraphicsPixmapItem):
             - x (float): x coordinate of the node
             - y (float): y coordinate of the node
             - image_path (str): file path of the image which represents the node
-            - edges (list of EdgeObject): List to keep track of connected edges
         '''
         super().__init__()
 
         self.key = key
         self.neighbors = set()
 
-        pixmap = QPixmap(image_path)  # Load custom node image
+        # Custom node image, decoded once and shared by all nodes
+        pixmap, self.half_width, self.half_height = pixmap_cache.get(image_path)
         self.setPixmap(pixmap)
 
         self.setPos(x, y)
         self.setAcceptHoverEvents(True)
 
-        self.edges = edges
+        self.edges = set()
 
         # Add text item for the number-key next to the node
         self.graphic_key = QGraphicsTextItem(str(self.key))
@@ -62,13 +65,86 @@ class NodeObject(QGraphicsPixmapItem):
         updated_cursor_y = updated_cursor_position.y() - orig_cursor_position.y() + orig_position.y()
         self.setPos(QPointF(updated_cursor_x, updated_cursor_y))
 
-        # Move the connected edges when the node is moved
-        for edge in self.edges:
-            edge.updatePosition()
-
         # Update the visual position of the key
         self.graphic_key.setPos(self.x() - 15, self.y() - 15)
 
+        # The connected edges follow on the next frame of the view, together with the edges of other moved nodes
+        for view in self.scene().views():
+            view.nodeMoved(self)
+
+
+class NodeList:
+    '''
+    Ordered container of the nodes of the graph. Removing a node is O(1): its slot becomes a hole, and the holes are
+    compacted away once, the next time a node is looked up by position. Iteration, len, truthiness, membership,
+    append, clear and positional indexing behave like a list
+
+    Attributes:
+        - nodes (list of NodeObject): The slots, None for removed nodes
+        - slots (dictionary): Maps every node to its slot in nodes
+    '''
+
+    def __init__(self):
+        '''
+        Initialize a new, empty instance of NodeList
+        '''
+        self.nodes = []
+        self.slots = {}
+
+    def append(self, node):
+        self.slots[node] = len(self.nodes)
+        self.nodes.append(node)
+
+    def remove(self, node):
+        '''
+        Removes a node in O(1)
+
+        Parameters:
+            - node (NodeObject): The node to remove
+        '''
+        self.nodes[self.slots.pop(node)] = None
+
+        # Holes at the end are dropped right away, so that node_list[-1] stays O(1) after deleting the newest nodes
+        while self.nodes and self.nodes[-1] is None:
+            self.nodes.pop()
+
+    def clear(self):
+        self.nodes.clear()
+        self.slots.clear()
+
+    def next_key(self):
+        '''
+        Returns the key of a new node, one after the key of the newest node. Never compacts: holes at the end are
+        dropped by remove, so the last slot always holds the newest node
+
+        Returns:
+            - int: The key, 0 for an empty list
+        '''
+        return self.nodes[-1].key + 1 if self.nodes else 0
+
+    def index(self, node):
+        self._compact()
+        return self.slots[node]
+
+    def _compact(self):
+        '''Closes the holes left by remove, O(n) once after any number of removals'''
+        if len(self.nodes) != len(self.slots):
+            self.nodes = [node for node in self.nodes if node is not None]
+            self.slots = {node: slot for slot, node in enumerate(self.nodes)}
+
+    def __getitem__(self, index):
+        self._compact()
+        return self.nodes[index]
+
+    def __iter__(self):
+        return (node for node in self.nodes if node is not None)
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, node):
+        return node in self.slots
+
 
-# List of NodeObject used in other files
-node_list = []
+# Nodes of the graph used in other files
+node_list = NodeList()
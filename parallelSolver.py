@@ -0,0 +1,299 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context, parent_process
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import scipy.sparse as sp
+
+from graphModel import GraphModel
+
+# Number of worker processes of the pool, set with set_worker_count
+worker_count = os.cpu_count() or 1
+
+# Problems with fewer edges (or Laplacian nonzeros) than this are solved in the calling process
+PARALLEL_MIN_EDGES = 100000
+
+_pool = None
+_pool_size = 0
+
+
+def set_worker_count(count):
+    '''
+    Sets the number of worker processes used by the parallel solves, 1 disables them
+
+    Parameters:
+        - count (int): Number of worker processes, None for the number of CPUs
+    '''
+    global worker_count
+
+    count = max(int(count or os.cpu_count() or 1), 1)
+    if count != worker_count:
+        shutdown_pool()
+    worker_count = count
+
+
+def resolve_workers(workers=None):
+    '''
+    Returns:
+        - int: The worker count requested by a caller, worker_count for None, at least 1
+    '''
+    return max(int(worker_count if workers is None else workers), 1)
+
+
+def parallel_enabled(size, workers=None):
+    '''
+    Decides whether a problem is worth fanning out to the process pool. Never true inside a worker process, so that
+    workers don't start pools of their own
+
+    Parameters:
+        - size (int): Number of edges or Laplacian nonzeros of the problem
+        - workers (int): Worker count requested by the caller, None for worker_count
+
+    Returns:
+        - bool: True if the problem should be solved in parallel
+    '''
+    return resolve_workers(workers) > 1 and size >= PARALLEL_MIN_EDGES and parent_process() is None
+
+
+def get_pool(workers=None):
+    '''
+    Parameters:
+        - workers (int): Worker processes the caller runs at once, None for worker_count
+
+    Returns:
+        - ProcessPoolExecutor: The process pool, created on first use and recreated when a caller needs more workers
+          than it has. Workers are spawned instead of forked because the GUI process runs several threads
+    '''
+    global _pool, _pool_size
+
+    workers = resolve_workers(workers)
+    if _pool is not None and _pool_size < workers:
+        shutdown_pool()
+
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'))
+        _pool_size = workers
+
+    return _pool
+
+
+def shutdown_pool():
+    '''Stops the worker processes of the pool'''
+    global _pool, _pool_size
+
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        _pool_size = 0
+
+
+class SharedArrays:
+    '''
+    Context manager which copies numpy arrays into shared memory blocks, so that worker processes can read and write
+    them without pickling. The blocks are released when the context exits
+
+    Attributes:
+        - spec (dictionary): Picklable description of the blocks, passed to the workers which open it with attach
+        - arrays (dictionary): The shared arrays, by name
+    '''
+
+    def __init__(self, **arrays):
+        '''
+        Initialize a new instance of SharedArrays
+
+        Parameters:
+            - arrays (numpy.ndarray): The arrays to share, by name
+        '''
+        self.spec = {}
+        self.arrays = {}
+        self._blocks = []
+
+        for name, array in arrays.items():
+            block = SharedMemory(create=True, size=max(array.nbytes, 1))
+            self._blocks.append(block)
+
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            shared[...] = array
+
+            self.spec[name] = (block.name, array.shape, array.dtype.str)
+            self.arrays[name] = shared
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # The views have to go before the blocks can be closed
+        self.arrays.clear()
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+
+def attach(spec):
+    '''
+    Opens the shared arrays described by spec in a worker process
+
+    Parameters:
+        - spec (dictionary): SharedArrays.spec
+
+    Returns:
+        - blocks (list of SharedMemory): The opened blocks, close them with detach
+        - arrays (dictionary): The shared arrays, by name
+    '''
+    blocks = []
+    arrays = {}
+
+    for name, (block_name, shape, dtype) in spec.items():
+        block = SharedMemory(name=block_name)
+        blocks.append(block)
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+
+    return blocks, arrays
+
+
+def detach(blocks, arrays):
+    '''
+    Closes the blocks opened by attach. Every other reference to the arrays must already be gone
+
+    Parameters:
+        - blocks (list of SharedMemory): The opened blocks
+        - arrays (dictionary): The shared arrays
+    '''
+    arrays.clear()
+    for block in blocks:
+        block.close()
+
+
+def run_tasks(function, tasks, workers, progress, phase):
+    '''
+    Runs function(*args) for every args of tasks on the process pool, keeping at most workers of them in flight, so
+    that a call never occupies more processes than it asked for. Pending tasks are cancelled if the progress callback
+    raises
+
+    Parameters:
+        - function (function): Module-level function run in the worker processes
+        - tasks (list of tuples): The arguments of every task
+        - workers (int): Tasks running at once, None for worker_count
+        - progress (function): Progress callback, see graphDecomposition.report_nothing
+        - phase (str): Name of the phase reported
+
+    Returns:
+        - list: The results of the tasks, in order
+    '''
+    workers = resolve_workers(workers)
+    pool = get_pool(workers)
+
+    futures = []
+    pending = set()
+
+    try:
+        while len(futures) < len(tasks) or pending:
+            while len(futures) < len(tasks) and len(pending) < workers:
+                future = pool.submit(function, *tasks[len(futures)])
+                futures.append(future)
+                pending.add(future)
+
+            _, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            progress(phase, (len(futures) - len(pending)) / len(tasks))
+
+        return [future.result() for future in futures]
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+
+
+def solve_columns(solver, columns, progress):
+    '''
+    Solves the grounded system of a conjugate gradient LaplacianSolver for many columns on the process pool.
+    The grounded Laplacian, the right hand sides and the solutions live in shared memory, each of the solver.workers
+    tasks solves a contiguous range of columns
+
+    Parameters:
+        - solver (LaplacianSolver): The solver, its method must be 'cg'
+        - columns (numpy.ndarray): Right hand sides in the grounded space, shape (size, k)
+        - progress (function): Progress callback, see graphDecomposition.report_nothing
+
+    Returns:
+        - numpy.ndarray: The solutions, shape (size, k)
+    '''
+    grounded = solver.grounded
+    options = {'tol': solver.tol, 'maxiter': solver.maxiter, 'preconditioner': solver.preconditioner}
+
+    arrays = {'data': grounded.data, 'indices': grounded.indices, 'indptr': grounded.indptr,
+              'columns': np.ascontiguousarray(columns), 'solution': np.zeros(columns.shape)}
+
+    workers = resolve_workers(solver.workers)
+
+    with SharedArrays(**arrays) as shared:
+        ranges = np.array_split(np.arange(columns.shape[1]), min(workers, columns.shape[1]))
+        tasks = [(shared.spec, grounded.shape, int(part[0]), int(part[-1]) + 1, options) for part in ranges if len(part)]
+
+        solver.converged &= all(run_tasks(_solve_column_range, tasks, workers, progress, 'solve'))
+
+        return shared.arrays['solution'].copy()
+
+
+def _solve_column_range(spec, shape, start, stop, options):
+    '''
+    Task of solve_columns, runs in a worker process
+
+    Returns:
+        - bool: False if a solve stopped at the iteration cap
+    '''
+    from laplacianSolver import LaplacianSolver
+
+    blocks, arrays = attach(spec)
+
+    grounded = sp.csr_matrix((arrays['data'], arrays['indices'], arrays['indptr']), shape=shape)
+    solver = LaplacianSolver.from_grounded(grounded, np.arange(shape[0]), method='cg', workers=1, **options)
+
+    arrays['solution'][:, start:stop] = solver.solve(arrays['columns'][:, start:stop])
+    converged = solver.converged
+
+    del grounded, solver
+    detach(blocks, arrays)
+
+    return converged
+
+
+def map_batches(compute, batches, options, progress, workers=None):
+    '''
+    Runs a centrality computation on the batches of graphDecomposition.decompose on the process pool.
+    The edges of all batches are shared through one set of shared arrays, every task rebuilds its own batch
+
+    Parameters:
+        - compute (function): Module-level function called as compute(batch_model, **options[i])
+        - batches (list of tuples): (GraphModel, numpy.ndarray) pairs of decompose
+        - options (list of dictionaries): Keyword arguments of compute for every batch
+        - progress (function): Progress callback, see graphDecomposition.report_nothing
+        - workers (int): Batches computed at once, None for worker_count
+
+    Returns:
+        - list of numpy.ndarray: The result of compute for every batch, in order
+    '''
+    edge_offsets = np.cumsum([0] + [batch_model.m for batch_model, _ in batches])
+    node_counts = np.array([batch_model.n for batch_model, _ in batches])
+
+    with SharedArrays(src=np.concatenate([batch_model.src for batch_model, _ in batches]),
+                      dst=np.concatenate([batch_model.dst for batch_model, _ in batches])) as shared:
+        tasks = [(shared.spec, int(edge_offsets[i]), int(edge_offsets[i + 1]), int(node_counts[i]), compute, options[i])
+                 for i in range(len(batches))]
+
+        return run_tasks(_run_batch, tasks, workers, progress, 'blocks')
+
+
+def _run_batch(spec, start, stop, nodes, compute, options):
+    '''
+    Task of map_batches, runs in a worker process
+
+    Returns:
+        - numpy.ndarray: The result of compute on the batch
+    '''
+    blocks, arrays = attach(spec)
+
+    batch_model = GraphModel(np.arange(nodes), arrays['src'][start:stop].copy(), arrays['dst'][start:stop].copy())
+    detach(blocks, arrays)
+
+    return compute(batch_model, **options)
@@ -0,0 +1,47 @@
+from PyQt6.QtGui import QPixmap
+
+
+class PixmapCache:
+    '''
+    Process-wide cache of the decoded node icons. Every NodeObject shares the QPixmap of its image instead of decoding
+    the file again, and reads the half extents of the icon computed here once, so the geometry of the edges doesn't
+    query the pixmap on every update.
+
+    Pixmaps can only be created once the QApplication exists, entries are therefore loaded on first use
+
+    Attributes:
+        - entries (dictionary): Maps an image path to its (QPixmap, half_width, half_height)
+    '''
+
+    def __init__(self):
+        '''
+        Initialize a new, empty instance of PixmapCache
+        '''
+        self.entries = {}
+
+    def get(self, path):
+        '''
+        Returns the icon of an image file, decoding it on first use
+
+        Parameters:
+            - path (str): The path of the image
+
+        Returns:
+            - pixmap (QPixmap): The decoded image, shared by all callers
+            - half_width, half_height (float): Half of the size of the image
+        '''
+        entry = self.entries.get(path)
+
+        if entry is None:
+            pixmap = QPixmap(path)
+            entry = self.entries[path] = (pixmap, pixmap.width() / 2, pixmap.height() / 2)
+
+        return entry
+
+    def clear(self):
+        '''Drops every cached icon, they are decoded again on next use'''
+        self.entries.clear()
+
+
+# Icons shared by all the nodes of the app
+pixmap_cache = PixmapCache()
@@ -0,0 +1,202 @@
+import json
+import time
+import tracemalloc
+
+# Measure allocated bytes in every profiled run, set with set_memory_tracing
+memory_tracing = False
+
+# Functions called with every finished profile, see add_hook
+_hooks = []
+
+
+def set_memory_tracing(enabled):
+    '''
+    Turns measuring allocated bytes on or off for the profilers created afterwards. Tracing slows the runs down
+
+    Parameters:
+        - enabled (bool): Measure allocated bytes with tracemalloc
+    '''
+    global memory_tracing
+    memory_tracing = bool(enabled)
+
+
+def add_hook(hook):
+    '''
+    Registers a function called as hook(profile) whenever a PhaseProfiler finishes
+
+    Parameters:
+        - hook (function): Receives the profile dictionary of PhaseProfiler.finish
+    '''
+    if hook not in _hooks:
+        _hooks.append(hook)
+
+
+def remove_hook(hook):
+    '''
+    Unregisters a hook of add_hook
+
+    Parameters:
+        - hook (function): The registered function
+    '''
+    if hook in _hooks:
+        _hooks.remove(hook)
+
+
+class PhaseProfiler:
+    '''
+    Progress callback that measures every phase a centrality function reports before passing the report on.
+    Wall time comes from perf_counter and CPU time from thread_time, so only the calling thread is counted and the
+    process pool of parallelSolver isn't. Allocated bytes are measured with tracemalloc while it is tracing
+
+    Attributes:
+        - name (str): Name of the profiled run, usually the algorithm
+        - info (dictionary): Further fields copied into the profile, e.g. nodes and edges
+        - progress (function): Progress callback the reports are passed on to, None for none
+        - trace_memory (bool): True if allocated bytes are measured
+        - phases (dictionary): Maps a phase to its wall, cpu, bytes and peak_bytes, summed when it is entered again
+    '''
+
+    def __init__(self, name, progress=None, trace_memory=None, **info):
+        '''
+        Initialize a new instance of PhaseProfiler, profiling starts right away
+
+        Parameters:
+            - name (str): Name of the profiled run
+            - progress (function): Progress callback the reports are passed on to, None for none
+            - trace_memory (bool): Measure allocated bytes, starting tracemalloc for the run if needed. None to follow
+              set_memory_tracing, or to measure them if tracemalloc is already tracing
+            - info: Further fields of the profile
+        '''
+        self.name = name
+        self.info = info
+        self.progress = progress
+        self.phases = {}
+        self.phase = None
+
+        if trace_memory is None:
+            trace_memory = memory_tracing or tracemalloc.is_tracing()
+        self.trace_memory = trace_memory
+        self._own_tracing = self.trace_memory and not tracemalloc.is_tracing()
+        if self._own_tracing:
+            tracemalloc.start()
+
+        self._peak = 0
+        self._started = time.time()
+        self._first = self._mark()
+        self._last = self._first
+
+    def _mark(self):
+        '''
+        Returns:
+            - tuple: Wall time, CPU time, traced bytes now and their peak since the last mark, which is reset
+        '''
+        current = peak = 0
+        if self.trace_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+
+        return time.perf_counter(), time.thread_time(), current, peak
+
+    def _close(self):
+        '''Adds the time and memory since the last mark to the current phase'''
+        wall, cpu, current, peak = self._mark()
+        last_wall, last_cpu, last_current, _ = self._last
+        self._last = (wall, cpu, current, peak)
+
+        # Peaks are measured from the traced bytes at the start of the run
+        peak -= self._first[2]
+        self._peak = max(self._peak, peak)
+
+        if self.phase is None:
+            return
+
+        record = self.phases.setdefault(self.phase, {'wall': 0.0, 'cpu': 0.0, 'bytes': 0, 'peak_bytes': 0})
+        record['wall'] += wall - last_wall
+        record['cpu'] += cpu - last_cpu
+        if self.trace_memory:
+            record['bytes'] += current - last_current
+            record['peak_bytes'] = max(record['peak_bytes'], peak)
+
+    def __call__(self, phase, fraction):
+        if phase != self.phase:
+            self._close()
+            self.phase = phase
+
+        if self.progress is not None:
+            self.progress(phase, fraction)
+
+    def finish(self):
+        '''
+        Closes the last phase and passes the profile to the registered hooks
+
+        Returns:
+            - dictionary: name, start timestamp, total wall and cpu seconds, peak_bytes (None without tracing), the
+              info fields and the phases
+        '''
+        self._close()
+        self.phase = None
+
+        wall, cpu, _, _ = self._last
+        profile = {'name': self.name, 'started': self._started, **self.info,
+                   'seconds': wall - self._first[0], 'cpu_seconds': cpu - self._first[1],
+                   'peak_bytes': self._peak if self.trace_memory else None,
+                   'phases': self.phases}
+
+        self.close()
+
+        for hook in list(_hooks):
+            hook(profile)
+
+        return profile
+
+    def close(self):
+        '''
+        Stops tracemalloc if this profiler started it. Called by finish, and needed after a cancelled or failed run so
+        that the tracing doesn't outlive it
+        '''
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+
+
+class JsonLinesLog:
+    '''
+    Hook that appends every profile to a JSON-lines file
+
+    Attributes:
+        - path (str): The log file
+    '''
+
+    def __init__(self, path):
+        '''
+        Initialize a new instance of JsonLinesLog
+
+        Parameters:
+            - path (str): The log file, created if needed
+        '''
+        self.path = path
+
+    def __call__(self, profile):
+        with open(self.path, 'a') as log_file:
+            log_file.write(json.dumps(profile) + '\n')
+
+
+def format_profile(profile):
+    '''
+    Formats a profile for display, one line per phase
+
+    Parameters:
+        - profile (dictionary): The result of PhaseProfiler.finish
+
+    Returns:
+        - str: The breakdown
+    '''
+    lines = [f'Total: {1000 * profile["seconds"]:.1f} ms wall, {1000 * profile["cpu_seconds"]:.1f} ms CPU']
+
+    for phase, record in profile['phases'].items():
+        line = f'{phase}: {1000 * record["wall"]:.1f} ms wall, {1000 * record["cpu"]:.1f} ms CPU'
+        if profile['peak_bytes'] is not None:
+            line += f', peak {record["peak_bytes"] / (1 << 20):.1f} MB'
+        lines.append(line)
+
+    return '\n'.join(lines)
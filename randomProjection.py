@@ -0,0 +1,77 @@
+import numpy as np
+
+# Number of edge columns of Q generated at a time when the projection is streamed
+PROJECTION_BLOCK_EDGES = 1 << 16
+
+
+def projection_dimension(n, epsilon=None, beta=1.0):
+    '''
+    Picks the number of random projections k
+
+    Parameters:
+        - n (int): Number of nodes of the graph
+        - epsilon (float): Requested Johnson-Lindenstrauss relative error in (0, 1), None for the default k = ceil(log2 n)
+        - beta (float): Failure probability exponent, the error bound holds with probability at least 1 - n^-beta
+
+    Returns:
+        - k (int): The number of projections
+    '''
+
+    if epsilon is None:
+        return max(int(np.ceil(np.log2(max(n, 2)))), 1)
+
+    if not 0 < epsilon < 1:
+        raise ValueError('epsilon must be between 0 and 1')
+
+    # Achlioptas' bound for database-friendly projections
+    return max(int(np.ceil((4 + 2 * beta) * np.log(max(n, 2)) / (epsilon ** 2 / 2 - epsilon ** 3 / 3))), 1)
+
+
+def projection_scale(k):
+    '''
+    Returns:
+        - float: The factor that turns the int8 entries of achlioptas_matrix into the projection sqrt(3 / k) * {+1, 0, -1}
+    '''
+    return np.sqrt(3.0 / k)
+
+
+def achlioptas_matrix(k, m, rng):
+    '''
+    Creates the unscaled sparse Achlioptas projection matrix, every entry is +1 or -1 with probability 1/6 each and 0
+    with probability 2/3. Scaled by projection_scale(k) it preserves squared norms in expectation
+
+    Parameters:
+        - k (int): Number of rows (projections)
+        - m (int): Number of columns (edges)
+        - rng (numpy.random.Generator): Source of randomness
+
+    Returns:
+        - numpy.ndarray: int8 matrix of shape (k, m)
+    '''
+
+    draws = rng.integers(0, 6, size=(k, m), dtype=np.int8)
+
+    Q = (draws == 0).view(np.int8)
+    Q -= (draws == 1).view(np.int8)
+
+    return Q
+
+
+def achlioptas_blocks(k, m, rng, block_edges=PROJECTION_BLOCK_EDGES):
+    '''
+    Streams the columns of an unscaled Achlioptas projection matrix in blocks, so that the whole k x m matrix never has
+    to be kept in memory
+
+    Parameters:
+        - k (int): Number of rows (projections)
+        - m (int): Number of columns (edges)
+        - rng (numpy.random.Generator): Source of randomness
+        - block_edges (int): Number of columns per block
+
+    Yields:
+        - start (int): Index of the first column of the block
+        - numpy.ndarray: int8 matrix of shape (k, block size)
+    '''
+
+    for start in range(0, m, block_edges):
+        yield start, achlioptas_matrix(k, min(block_edges, m - start), rng)
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+
+import numpy as np
+
+# Number of centrality results kept by result_cache
+RESULT_CACHE_ENTRIES = 32
+
+
+class ResultCache:
+    '''
+    LRU cache of centrality results, keyed by the fingerprint of the graph, the algorithm and its options.
+    Values are stored in the canonical edge order of GraphModel.fingerprint, so a hit can be returned for any model
+    with the same structure, whatever the order of its edges.
+
+    A run without a seed is cached as its first draw, re-running it on the same graph returns the same estimate.
+
+    Attributes:
+        - max_entries (int): Number of results kept, the least recently used one is evicted first
+        - entries (OrderedDict): Maps (digest, algorithm, options) to the centralities in canonical edge order
+    '''
+
+    def __init__(self, max_entries=RESULT_CACHE_ENTRIES):
+        '''
+        Initialize a new instance of ResultCache
+
+        Parameters:
+            - max_entries (int): Number of results kept
+        '''
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def key(model, algorithm, options):
+        '''
+        Returns:
+            - tuple: The cache key of running algorithm with options on model
+        '''
+        digest, _ = model.fingerprint()
+        return digest, algorithm, tuple(sorted(options.items()))
+
+    def get(self, model, algorithm, options=None):
+        '''
+        Looks up the result of a run
+
+        Parameters:
+            - model (GraphModel): The graph
+            - algorithm (str): Name of the algorithm
+            - options (dictionary): Keyword arguments of the algorithm, including its seed
+
+        Returns:
+            - numpy.ndarray: The centrality of every edge in the edge order of model, None if it isn't cached
+        '''
+        key = self.key(model, algorithm, options or {})
+        if key not in self.entries:
+            return None
+
+        self.entries.move_to_end(key)
+
+        _, order = model.fingerprint()
+        centralities = np.empty(model.m)
+        centralities[order] = self.entries[key]
+
+        return centralities
+
+    def put(self, model, algorithm, options, centralities):
+        '''
+        Stores the result of a run, evicting the least recently used results beyond max_entries
+
+        Parameters:
+            - model (GraphModel): The graph
+            - algorithm (str): Name of the algorithm
+            - options (dictionary): Keyword arguments of the algorithm, including its seed
+            - centralities (numpy.ndarray): The centrality of every edge in the edge order of model
+        '''
+        key = self.key(model, algorithm, options or {})
+        _, order = model.fingerprint()
+
+        self.entries[key] = np.asarray(centralities, dtype=np.float64)[order]
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        '''Drops every cached result'''
+        self.entries.clear()
+
+
+# Results of the Centralities menu, shared by the whole app
+result_cache = ResultCache()
@@ -1,110 +1,170 @@
 import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import lapack
+from scipy.sparse.csgraph import connected_components
 
+from factorizationCache import factorization_cache
+from graphDecomposition import blockwise, report_nothing
 
-def get_laplacian_matrix(graph_edges, node_list):
+
+def get_laplacian_matrix(model, dense=False):
     '''
-    Creates the Laplacian matrix of the graph by subtracting Adjacency matrix from Degree matrix
+    Creates the Laplacian matrix of the graph by subtracting Adjacency matrix from Degree matrix.
+    The matrix is assembled directly from the edge endpoint arrays, duplicate edges count once and self-loops are ignored
 
     Parameters:
-         - graph_edges (list of EdgeObject): The edges of the graph
-         - node_list (list of NodeObject): The nodes of the graph
+         - model (GraphModel): The graph
+         - dense (bool): Return a dense numpy array instead of a sparse matrix, only meant for small graphs
 
     Returns:
-        - laplacian_matrix (numpy.ndarray): The Laplacian matrix of the graph
+        - laplacian_matrix (scipy.sparse.csr_matrix or numpy.ndarray): The Laplacian matrix of the graph
     '''
 
-    # Initialize the Adjacency Matrix
-    node_num = len(node_list)
-    adj_matrix = np.zeros((node_num, node_num), dtype=int)
+    n = model.n
+    u, v = model.simple_edges()
 
-    # Populate the Adjacency Matrix
-    for edge in graph_edges:
-        # Given that edge.node1 and edge.node2 are NodeObject instances
-        index1 = node_list.index(edge.node1)
-        index2 = node_list.index(edge.node2)
+    # Degree of every node in the simple graph
+    degrees = np.bincount(u, minlength=n) + np.bincount(v, minlength=n)
 
-        # Set the corresponding entries in the adjacency matrix to 1
-        adj_matrix[index1, index2] = 1
-        adj_matrix[index2, index1] = 1
+    # Off-diagonal -1 entries for both directions of every edge followed by the degrees on the diagonal
+    rows = np.concatenate((u, v, np.arange(n)))
+    cols = np.concatenate((v, u, np.arange(n)))
+    data = np.concatenate((-np.ones(2 * len(u)), degrees.astype(float)))
 
-    # Create the Degree matrix of the graph
-    degree_matrix = np.diag(np.sum(adj_matrix, axis=1))
+    laplacian_matrix = sp.csr_matrix((data, (rows, cols)), shape=(n, n))
 
-    # Create the Laplacian matrix by subtracting Adjacency matrix from Degree matrix
-    laplacian_matrix = degree_matrix - adj_matrix
+    if dense:
+        return laplacian_matrix.toarray()
 
     return laplacian_matrix
 
 
-def normalize_matrix(matrix):
+def ground_laplacian(model, laplacian_matrix=None):
     '''
-    Normalizes the (Laplacian) matrix to scale down matrices with inf elements
+    Grounds the Laplacian matrix per connected component: the first node of every component is removed, which makes
+    the remaining matrix symmetric positive definite. The grounded nodes get potential 0, which leaves every potential
+    difference inside a component unchanged
 
     Parameters:
-        - matrix (numpy.ndarray): The matrix to normalize
+        - model (GraphModel): The graph
+        - laplacian_matrix (scipy.sparse.csr_matrix): The sparse Laplacian of the graph, built when not given
 
     Returns:
-        - normalized_matrix (numpy.ndarray): The normalized matrix
+        - grounded (scipy.sparse.csr_matrix): The Laplacian without the rows and columns of the grounded nodes
+        - keep (numpy.ndarray): Indices of the nodes that remain in the grounded matrix
     '''
-    # Find max absolute value in the matrix
-    max_abs_value = np.max(np.abs(matrix))
 
-    # Set a threshold to prevent division by very small numbers
-    threshold = 1e-12
+    if laplacian_matrix is None:
+        laplacian_matrix = get_laplacian_matrix(model)
 
-    # Calculate the scaling factor
-    scale_factor = 1.0 / max(max_abs_value, threshold)
+    # Label the connected components and ground the first node of each of them
+    _, labels = connected_components(laplacian_matrix, directed=False)
+    _, roots = np.unique(labels, return_index=True)
 
-    # Normalize the matrix
-    normalized_matrix = matrix * scale_factor
+    keep = np.setdiff1d(np.arange(model.n), roots)
 
-    return normalized_matrix
+    return laplacian_matrix[keep][:, keep], keep
 
 
-def spanEdgeBetw(window, node_list):
+def grounded_laplacian(model):
     '''
-    Calculates the Spanning Edge Betweenness centrality for every edge
+    Returns the Laplacian of the model grounded per connected component, shared through factorization_cache
 
     Parameters:
-        - window (QMainWindow): The main window of the app
-        - node_list (list of NodeObject): The nodes of the graph
+        - model (GraphModel): The graph
 
-    Algorithm:
-        - Calculate the Laplacian matrix of the graph and a cofactor of it
-        - According to Kirchhoff's Matrix Tree Theorem the number of MSTs of the graph equals to det of the cofactor of
-          Laplacian matrix
-        - The number of MSTs containing edge = {u, v} equals the det of Lij which is the laplacian matrix by deleting
-          rows u and v and columns u and v
-        - The spanning betweenness for each edge equals to MSTs containing the edge / total MSTs
+    Returns:
+        - grounded (scipy.sparse.csr_matrix): The Laplacian without the rows and columns of the grounded nodes
+        - keep (numpy.ndarray): Indices of the nodes that remain in the grounded matrix
+    '''
+
+    def build():
+        laplacian_matrix = factorization_cache.get(model, 'laplacian', lambda: get_laplacian_matrix(model))
+        return ground_laplacian(model, laplacian_matrix)
+
+    return factorization_cache.get(model, 'grounded', build)
+
+
+def upper_cholesky(grounded):
     '''
+    Factorises a grounded Laplacian densely
 
-    if not node_list:
-        return
+    Parameters:
+        - grounded (scipy.sparse.csr_matrix): The grounded Laplacian matrix
+
+    Returns:
+        - numpy.ndarray: The upper triangular Cholesky factor U, grounded = U^T U, with zeros below the diagonal
+    '''
 
-    laplacian_matrix = get_laplacian_matrix(window.graphic_view.edges, node_list)
+    factor, info = lapack.dpotrf(grounded.toarray(), lower=False, overwrite_a=True, clean=True)
+    if info != 0:
+        raise np.linalg.LinAlgError('Grounded Laplacian is not positive definite')
 
-    cofactor = np.linalg.det(laplacian_matrix[1:, 1:])
+    return factor
 
-    if np.isinf(cofactor):
-        laplacian_matrix = normalize_matrix(laplacian_matrix)
 
-        cofactor = np.linalg.det(laplacian_matrix[1:, 1:])
+def effective_resistances(model, progress=report_nothing):
+    '''
+    Calculates the effective resistance R(e) = (e_u - e_v)^T L^+ (e_u - e_v) of every edge. The grounded Laplacian is
+    factorised and inverted once, then every edge reads three entries of the inverse. The factorisation is shared with
+    LaplacianSolver through factorization_cache
 
-    # Initialize a dictionary to store results for each edge
-    spanning_betweenness_for_edges = {}
+    Parameters:
+        - model (GraphModel): The graph
+        - progress (function): Progress callback, see graphDecomposition.report_nothing
 
-    for edge in window.graphic_view.edges:
-        i, j = edge.node1.key, edge.node2.key
+    Returns:
+        - numpy.ndarray: The effective resistance of every edge, in the edge order of the model
+    '''
 
-        laplacian_ij = np.delete(laplacian_matrix, [i, j], axis=0)
-        laplacian_ij = np.delete(laplacian_ij, [i, j], axis=1)
+    progress('laplacian', 0.0)
+    grounded, keep = grounded_laplacian(model)
 
-        # Number of spanning trees containing the edge
-        trees_for_edges = np.linalg.det(laplacian_ij)
+    resistances = np.zeros(model.m)
+    if not len(keep):
+        return resistances
 
-        # Store the result for the edge
-        spanning_betweenness_for_edges[f'({edge.node1.key},{edge.node2.key})'] = round(trees_for_edges / cofactor, 4)
+    # Cholesky factorisation and inversion, only the upper triangle of the inverse is filled
+    progress('factorisation', 0.1)
+    factor = factorization_cache.get(model, 'cholesky', lambda: upper_cholesky(grounded))
+    inverse, info = lapack.dpotri(factor, lower=False, overwrite_c=False)
+
+    # Position of every node in the grounded matrix, -1 for the grounded nodes
+    progress('resistances', 0.9)
+    position = np.full(model.n, -1, dtype=np.int64)
+    position[keep] = np.arange(len(keep))
+
+    pu, pv = position[model.src], position[model.dst]
+    diagonal = np.append(inverse.diagonal(), 0.0)  # The extra 0 is read by grounded nodes through index -1
+
+    # Cross term from the upper triangle, it vanishes when one of the endpoints is grounded
+    both = (pu >= 0) & (pv >= 0)
+    cross = np.zeros(model.m)
+    cross[both] = inverse[np.minimum(pu[both], pv[both]), np.maximum(pu[both], pv[both])]
+
+    resistances = diagonal[pu] + diagonal[pv] - 2 * cross
+
+    return resistances
+
+
+def spanning_edge_betweenness(model, progress=report_nothing):
+    '''
+    Calculates the Spanning Edge Betweenness centrality for every edge of the model
+
+    Parameters:
+        - model (GraphModel): The graph
+        - progress (function): Progress callback, see graphDecomposition.report_nothing
+
+    Returns:
+        - numpy.ndarray: The centrality of every edge, in the edge order of the model
+
+    Algorithm:
+        - By Kirchhoff's Matrix Tree Theorem the fraction of spanning trees containing the edge e = {u, v} equals the
+          ratio of the cofactor of the Laplacian without rows and columns u and v to the cofactor of the Laplacian
+        - That ratio is the effective resistance of e, R(e) = (e_u - e_v)^T L^+ (e_u - e_v)
+        - Split the graph into biconnected blocks, bridges are in every spanning tree and get 1
+        - For every batch of blocks ground the Laplacian per block, invert it once with a Cholesky factorisation and
+          read R(e) for every edge from the inverse
+    '''
 
-    window.side_table.update_table(spanning_betweenness_for_edges)
-    window.side_label.setText('Algorithm: Spanning Edge Betweenness')
-    window.dock_widget.setHidden(False)
+    return blockwise(model, effective_resistances, progress)
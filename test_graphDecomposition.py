@@ -0,0 +1,21 @@
+import numpy as np
+
+from centralityAlgorithms import ALGORITHMS
+from graphDecomposition import decompose
+from graphModel import GraphModel
+
+
+def test_decompose_self_loops_only():
+    '''A graph made only of self-loops has no blocks, so no bridges and no batches'''
+    bridges, batches = decompose(GraphModel([0, 1], [0, 1], [0, 1]))
+
+    assert len(bridges) == 0
+    assert batches == []
+
+
+def test_algorithms_self_loops_only():
+    '''Self-loops get 0.0 from every algorithm, also when the graph has no other edges'''
+    model = GraphModel([0, 1], [0], [0])
+
+    for _, compute in ALGORITHMS.values():
+        assert np.array_equal(compute(model), [0.0])
@@ -1,92 +1,124 @@
 import numpy as np
+import scipy.sparse as sp
 
-from spanningEdgeBetweenness import get_laplacian_matrix
+from graphDecomposition import blockwise, report_nothing
+from laplacianSolver import LaplacianSolver
+from randomProjection import achlioptas_blocks, projection_dimension, projection_scale
 
 
-def edge_incidence_matrix(graph_edges, node_list):
+def edge_incidence_matrix(model):
     '''
     Creates the Edge Incidence matrix, matrix of size m x n such that each row corresponds to an edge and each column
-    to a node of the graph.
+    to a node of the graph. Stored sparse, every row has -1 at the first and 1 at the second endpoint of its edge.
+    The algorithms use incidence_project instead, which never builds the matrix
 
     Parameters:
-         - graph_edges (list of EdgeObject): The edges of the graph
-         - node_list (list of NodeObject): The nodes of the graph
+         - model (GraphModel): The graph
 
     Returns:
-        - B (numpy.ndarray): Edge Incidence matrix of the graph
+        - B (scipy.sparse.csr_matrix): Edge Incidence matrix of the graph
     '''
 
-    n = len(node_list)
-    m = len(graph_edges)
+    rows = np.repeat(np.arange(model.m), 2)
+    cols = np.column_stack((model.src, model.dst)).ravel()
+    data = np.tile([-1.0, 1.0], model.m)
 
-    # Create the edge-incidence matrix B
-    B = np.zeros((m, n))
+    return sp.csr_matrix((data, (rows, cols)), shape=(model.m, model.n))
 
-    for i, edge in enumerate(graph_edges):
-        u, v = edge.node1.key, edge.node2.key
-        B[i, u] = -1
-        B[i, v] = 1
 
-    return B
+def incidence_project(Q, model, start=0):
+    '''
+    Computes QB for a block of edge columns of Q without building B: row i of the result is a scatter-add of Q(i, :)
+    into the second endpoints minus a scatter-add into the first endpoints. With a single row it computes B^T x.
+    Costs O(km) time and O(kn) memory
 
+    Parameters:
+        - Q (numpy.ndarray): Matrix of shape (k, b) holding the columns start ... start + b - 1 of the projection
+        - model (GraphModel): The graph
+        - start (int): Index of the edge of the first column of Q
 
-def treeC(window, node_list):
+    Returns:
+        - Y (numpy.ndarray): Matrix of shape (k, n), the contribution of the block to QB
     '''
-    Calculates the Spanning Edge Betweenness centrality for every edge by using the TreeC algorithm
+
+    src = model.src[start:start + Q.shape[1]]
+    dst = model.dst[start:start + Q.shape[1]]
+
+    Y = np.empty((Q.shape[0], model.n))
+    for i, row in enumerate(Q):
+        row = row.astype(np.float64)
+        Y[i] = np.bincount(dst, weights=row, minlength=model.n) - np.bincount(src, weights=row, minlength=model.n)
+
+    return Y
+
+
+def treec_resistances(model, epsilon=None, rng=None, solver_options=None, progress=report_nothing):
+    '''
+    Approximates the effective resistance of every edge of the model by using the TreeC algorithm
 
     Parameters:
-        - window (QMainWindow): The main window of the app
-        - node_list (list of NodeObject): The nodes of the graph
+        - model (GraphModel): The graph
+        - epsilon (float): Johnson-Lindenstrauss relative error that picks k, None for k = ceil(log2 n)
+        - rng (numpy.random.Generator): Source of randomness of the projections
+        - solver_options (dictionary): Keyword arguments of LaplacianSolver, e.g. method, tol, maxiter, preconditioner
+        - progress (function): Progress callback, see graphDecomposition.report_nothing
+
+    Returns:
+        - numpy.ndarray: The centrality of every edge, in the edge order of the model
 
     TreeC Algorithm:
-        - Construct the Laplacian matrix of the graph
-        - Construct random {0, +-1/sqrt(k)} projection matrix Q of size k x m where k = O(log n) , m: number of graph edges
-        - Construct the Edge Incidence matrix B and compute the matrix Y = QB
-        - for i ... k do
-            Approximate zi by solving Lzi = Y(i, :)
-            Append zi as a row to matrix Z
-        - Calculate for each edge e = {u, v} R(e) = ||Z(:,u) - Z(:,v)||_2^2 which is equivalent to the
+        - Construct the Laplacian matrix of the graph, ground it per connected component and prepare its solver
+        - Construct the sparse Achlioptas projection matrix Q of size k x m with entries sqrt(3/k) * {+1, 0, -1}
+          and probabilities {1/6, 2/3, 1/6}, k from epsilon, m: number of graph edges
+        - Compute the matrix Y = QB by scatter-adds over the edge endpoints, B: Edge Incidence matrix, streaming Q in
+          blocks of edges
+        - Solve LZ = Y^T for all k rows of Y as a single block
+        - Calculate for each edge e = {u, v} R(e) = ||Z(u,:) - Z(v,:)||_2^2 which is equivalent to the
           spanning betweenness centrality of the edge e
     '''
 
-    if not node_list:
-        return
-
-    # Initialize matrices and Laplacian matrix
-    Z = np.empty((0, len(node_list)))
-    laplacian_matrix = get_laplacian_matrix(window.graphic_view.edges, node_list)
-
-    # Construct edge incidence matrix B
-    B = edge_incidence_matrix(window.graphic_view.edges, node_list)
-
-    # Construct random projection matrix Q
-    k = int(np.ceil(np.log2(len(node_list))))  # k = O(log n)
-    m = len(window.graphic_view.edges)
-    Q = np.random.choice([-1/np.sqrt(k), 0, 1/np.sqrt(k)], size=(k, m))
-
-    # Compute Y = QB
-    Y = np.dot(Q, B)
-
-    # Approximate zi by solving Lzi = Y[:, i]
-    for i in range(k):
-        try:
-            zi = np.linalg.solve(laplacian_matrix, Y[i, :])
-        except np.linalg.LinAlgError as e:
-            if 'Singular matrix' in str(e):
-                # If matrix is singular use a least squares solution
-                zi = np.linalg.lstsq(laplacian_matrix, Y[i, :], rcond=None)[0]
-            else:
-                print('Error:', e)
-        Z = np.vstack((Z, zi))
-
-    # Compute and return R(e)
-    # R = np.zeros(m)
-    R = {}
-    for i, edge in enumerate(window.graphic_view.edges):
-        u, v = edge.node1.key, edge.node2.key
-
-        R[f'({u},{v})'] = round(np.linalg.norm(Z[:, u] - Z[:, v])**2, 4)
-
-    window.side_table.update_table(R)
-    window.side_label.setText('Algorithm: TreeC')
-    window.dock_widget.setHidden(False)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # Prepare the solver of the grounded Laplacian matrix
+    progress('laplacian', 0.0)
+    solver = LaplacianSolver(model, **(solver_options or {}))
+
+    # Compute Y = QB one block of edge columns of Q at a time, B stays implicit
+    k = projection_dimension(model.n, epsilon)
+    Y = np.zeros((k, model.n))
+    for start, Q in achlioptas_blocks(k, model.m, rng):
+        progress('projection', 0.1 + 0.3 * start / model.m)
+        Y += incidence_project(Q, model, start)
+    Y *= projection_scale(k)
+
+    # Solve all k rows of Y at once into the preallocated Z, row u of Z holds the k coordinates of node u
+    progress('solve', 0.4)
+    Z = np.empty((model.n, k))
+    solver.solve(Y.T, out=Z, progress=lambda phase, fraction: progress(phase, 0.4 + 0.5 * fraction))
+
+    # Compute R(e) for all edges at once
+    progress('accumulation', 0.9)
+    R = np.sum((Z[model.src] - Z[model.dst])**2, axis=1)
+
+    return R
+
+
+def treec_centrality(model, epsilon=None, seed=None, solver_options=None, progress=report_nothing):
+    '''
+    Calculates the Spanning Edge Betweenness centrality for every edge of the model by using the TreeC algorithm.
+    Bridges get their exact value 1 and every batch of biconnected blocks is approximated independently
+
+    Parameters:
+        - model (GraphModel): The graph
+        - epsilon (float): Johnson-Lindenstrauss relative error that picks k, None for k = ceil(log2 n)
+        - seed (int): Seed of the random projections, None for a fresh one on every run
+        - solver_options (dictionary): Keyword arguments of LaplacianSolver, e.g. method, tol, maxiter, preconditioner
+        - progress (function): Progress callback, see graphDecomposition.report_nothing
+
+    Returns:
+        - numpy.ndarray: The centrality of every edge, in the edge order of the model
+    '''
+
+    return blockwise(model, treec_resistances, progress, seeds=np.random.SeedSequence(seed), epsilon=epsilon,
+                     solver_options=solver_options)